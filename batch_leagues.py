@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+import lineup_optimizer
+import scoring
+from lineup_optimizer import LeagueConfig
+from player_pool import load_players, save_player_pool, POOL_EXTENSION
+from sim_cache import SimulationCache
+
+
+# Settings a league config may give (see LeagueConfig)
+LEAGUE_KEYS = ['name', 'roster_size', 'restrictions', 'flex_positions', 'flex_spots']
+
+
+def load_leagues(path):
+    """
+    This method reads the league configs of a batch from a JSON file holding a list of objects, e.g.
+
+        [{"name": "office", "roster_size": 16},
+         {"name": "superflex", "roster_size": 15, "flex_positions": ["QB", "RB", "WR", "TE"], "flex_spots": 2,
+          "restrictions": {"QB": [1, 4], "RB": [2, 8], "WR": [2, 8], "TE": [1, 3], "D/ST": [1, 3]}}]
+
+    Settings that are left out are taken from the default league (see LeagueConfig).
+
+    :param path: string, JSON file to read
+    :return: list of LeagueConfigs
+    """
+
+    with open(path) as f:
+        configs = json.load(f)
+    if not isinstance(configs, list):
+        raise ValueError('Expected a list of league configs in '+str(path))
+
+    leagues = []
+    for i, config in enumerate(configs):
+        unknown = sorted(set(config) - set(LEAGUE_KEYS))
+        if unknown:
+            raise ValueError('Unknown settings in league config '+str(i + 1)+': '+', '.join(unknown))
+        config = dict((str(key), value) for key, value in config.items())
+        config.setdefault('name', 'league_'+str(i + 1))
+        leagues.append(LeagueConfig(**config))
+
+    # Every league writes its own result, so the names have to be distinct file names
+    names = [league.name for league in leagues]
+    for name in names:
+        if not name or os.sep in name or '/' in name or names.count(name) > 1:
+            raise ValueError('League names must be distinct file names, got '+repr(name))
+    return leagues
+
+
+def _solve_leagues(leagues, pool, method):
+    """
+    This method builds the optimal roster of several leagues from the same player pool in a worker process.
+
+    :param leagues: list of LeagueConfigs
+    :param pool: pandas dataframe with all available players (including points earned in MC simulation)
+    :param method: string, 'greedy' or 'exact' (see build_optimal_team)
+    :return: list of the player_ids on the roster of each league
+    """
+
+    roster = pd.DataFrame(columns=pool.columns)
+    return [list(lineup_optimizer.build_optimal_team(roster, pool, method, league).index) for league in leagues]
+
+
+def solve_leagues(leagues, pool, method='greedy', workers=1):
+    """
+    This method builds the optimal roster of every league from one simulated player pool. The pool is only simulated
+    once for the whole batch, so each league only costs a run of the optimizer. With workers > 1 the leagues are split
+    across a process pool, which is sent a copy of the pool for each chunk of leagues.
+
+    :param leagues: list of LeagueConfigs
+    :param pool: pandas dataframe with all available players (including points earned in MC simulation)
+    :param method: string, 'greedy' or 'exact' (see build_optimal_team)
+    :param workers: int, number of processes to solve the leagues with
+    :return: list of pandas dataframes with the roster of each league
+    """
+
+    # The Player objects aren't needed to pick a roster, so they aren't sent to the workers
+    pool = pool.drop('player_object', axis=1) if 'player_object' in pool.columns else pool
+
+    if workers > 1 and len(leagues) > 1:
+        chunks = [list(chunk) for chunk in np.array_split(np.arange(len(leagues)), workers) if len(chunk)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_solve_leagues, [leagues[i] for i in chunk], pool, method) for chunk in chunks]
+            rosters = [roster for future in futures for roster in future.result()]
+    else:
+        rosters = _solve_leagues(leagues, pool, method)
+    return [pool.loc[roster] for roster in rosters]
+
+
+def simulate_pool(N, seed=None, workers=1, cache=None, tolerance=None, leagues=None):
+    """
+    This method simulates every active player that could make a roster, the same way lineup_optimizer.py does (without
+    asking for players to include or exclude).
+
+    :param N: int number of times to run the MC simulation on each player
+    :param seed: int, seed for the per-player random number generators (optional)
+    :param workers: int number of processes to shard the players across
+    :param cache: SimulationCache to reuse simulated points from (optional, needs a seed)
+    :param tolerance: float, run the adaptive simulation with this tolerance (optional, see simulate_adaptive)
+    :param leagues: list of LeagueConfigs the adaptive simulation has to get the rosters of right
+    :return: pandas dataframe with information on each player (see players_to_df)
+    """
+
+    table = lineup_optimizer.load_score_table()
+    candidates, report = lineup_optimizer.prune_candidates(lineup_optimizer.get_active_players(), table, N)
+    return lineup_optimizer.players_to_df(candidates, N, table, seed, workers, cache, tolerance, leagues)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the optimal roster of many leagues from one simulation.')
+    parser.add_argument('leagues', help='JSON file with a list of league configs (see load_leagues)')
+    parser.add_argument('--pool', default=None,
+                        help='simulated players to use (e.g. 100_sim_all_players.npy) instead of simulating them')
+    parser.add_argument('--sims', type=int, default=100, help='number of simulations to average for each player')
+    parser.add_argument('--output', default='leagues', help='folder to write the roster of each league to')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes to simulate and solve with')
+    parser.add_argument('--seed', type=int, default=None, help='seed for reproducible simulations')
+    parser.add_argument('--scoring', default=scoring.DEFAULT_PROFILE,
+                        help='scoring profile shared by every league: '+', '.join(sorted(scoring.PROFILES))+
+                             ' or a JSON file')
+    parser.add_argument('--cache', default=None,
+                        help='folder to store simulation results in and reuse them from (needs --seed)')
+    parser.add_argument('--adaptive', type=float, default=None, metavar='TOLERANCE',
+                        help='simulate adaptively with this tolerance (see lineup_optimizer.py)')
+    parser.add_argument('--method', choices=['greedy', 'exact'], default='greedy',
+                        help='greedy picks, or an exactly optimal roster')
+    args = parser.parse_args()
+    try:
+        leagues = load_leagues(args.leagues)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.cache and args.seed is None:
+        parser.error('--cache needs --seed, results of unseeded simulations can not be reused')
+    if args.adaptive is not None and args.workers > 1 and not args.pool:
+        parser.error('--adaptive simulates in a single process, it can not be used with --workers')
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+
+    # Simulate the player pool once for every league
+    start = time.time()
+    if args.pool:
+        pool = load_players(args.pool)
+        print('Loaded '+str(len(pool.index))+' players from '+args.pool)
+    else:
+        lineup_optimizer.set_scoring_profile(args.scoring)
+        cache = SimulationCache(args.cache) if args.cache else None
+        pool = simulate_pool(args.sims, args.seed, args.workers, cache, args.adaptive, leagues)
+        save_player_pool(pool, os.path.join(args.output, str(args.sims)+'_sim_all_players'+POOL_EXTENSION))
+        print('Simulated '+str(len(pool.index))+' players in '+str(round(time.time() - start, 2))+' seconds')
+
+    # Then solve the roster of each league from it
+    start = time.time()
+    rosters = solve_leagues(leagues, pool, args.method, args.workers)
+    print('Solved '+str(len(leagues))+' leagues in '+str(round(time.time() - start, 2))+' seconds')
+
+    summary = []
+    for league, roster in zip(leagues, rosters):
+        roster = roster.sort_values(by='points', ascending=False)
+        roster.to_csv(os.path.join(args.output, league.name+'_optimal_team'), index_label='player_id')
+        summary.append([league.name, len(roster.index), league.roster_size, roster['points'].sum()])
+    print(tabulate(summary, headers=['league', 'players', 'roster size', 'points'], tablefmt='psql', floatfmt='.2f'))
+    print('Wrote the roster of each league to '+args.output)
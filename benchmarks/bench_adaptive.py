@@ -0,0 +1,92 @@
+import argparse
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import numpy as np
+import pandas as pd
+import lineup_optimizer
+import score_table
+
+
+def expected_points(table):
+    """
+    This method computes the exact expected points of each player under the current weighting model: the weighted
+    average of the weeks they played. A simulation with infinitely many draws would converge to these.
+
+    :param table: ScoreTable with precomputed weekly points
+    :return: dict mapping each player_id to their expected points (-inf if they never played)
+    """
+
+    weights = lineup_optimizer._weighting.column_weights(table.weeks)
+    played = ~np.isnan(table.points)
+    totals = np.where(played, table.points, 0.0).dot(weights)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = np.where(played.dot(weights) > 0, totals / played.dot(weights), -np.inf)
+    return dict(zip(table.player_ids, expected))
+
+
+def roster_points(players, means, truth):
+    """
+    :param players: list of Player objects
+    :param means: numpy array of the simulated points of each player
+    :param truth: dict mapping each player_id to their expected points
+    :return: float, expected points of the roster built greedily from the simulated points
+    """
+
+    pool = pd.DataFrame({'position': [p.position for p in players], 'points': means},
+                        index=[p.player_id for p in players], columns=['position', 'points'])
+    roster = lineup_optimizer.build_optimal_team(pd.DataFrame(columns=['position', 'points']), pool)
+    return sum(truth[player_id] for player_id in roster.index)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare adaptive simulation against a fixed number of draws.')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--sims', type=int, default=1000, help='fixed number of simulations (and most draws adaptive)')
+    parser.add_argument('--tolerance', type=float, nargs='+', default=[0.05, 0.1, 0.2])
+    parser.add_argument('--far-tolerance', type=float, default=None,
+                        help='tolerance for players clearly on or off the roster (see simulate_adaptive)')
+    parser.add_argument('--seeds', type=int, default=5)
+    args = parser.parse_args()
+
+    synthetic_nflgame.configure(args.players)
+    players = sorted(synthetic_nflgame.players.values(), key=lambda p: p.player_id)
+    players = [p for p in players if p.position in lineup_optimizer.FF_POSITIONS]
+    directory = tempfile.mkdtemp()
+    try:
+        table = score_table.build_score_table(lineup_optimizer.YEARS, lineup_optimizer.WEEKS,
+                                              lineup_optimizer._scoring_weights, directory)
+    finally:
+        shutil.rmtree(directory)
+    truth = expected_points(table)
+    best = roster_points(players, np.array([truth.get(p.player_id, -np.inf) for p in players]), truth)
+    table.sampling_tables(lineup_optimizer._weighting)
+
+    print('%d players, best possible roster %.2f pts' % (len(players), best))
+    for tolerance in [None] + args.tolerance:
+        draws, seconds, gaps = [], [], []
+        for seed in range(args.seeds):
+            start = time.time()
+            if tolerance is None:
+                means, variances = lineup_optimizer.simulate_matrix([p.player_id for p in players], args.sims, seed,
+                                                                    table)
+                counts = np.full(len(players), args.sims)
+            else:
+                means, variances, counts = lineup_optimizer.simulate_adaptive(players, table, seed, tolerance,
+                                                                              args.sims,
+                                                                              far_tolerance=args.far_tolerance)
+            seconds.append(time.time() - start)
+            draws.append(counts.sum())
+            gaps.append(best - roster_points(players, means, truth))
+        print('%-22s %9d draws (%5.1f%%) in %6.1f ms, roster %.3f pts below the best (worst %.3f)'
+              % ('fixed N=%d' % args.sims if tolerance is None else 'adaptive tol=%g' % tolerance, np.mean(draws),
+                 100.0 * np.mean(draws) / (args.sims * len(players)), 1000 * np.mean(seconds), np.mean(gaps),
+                 np.max(gaps)))
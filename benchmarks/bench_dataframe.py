@@ -0,0 +1,45 @@
+import argparse
+import os.path
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import pandas as pd
+import lineup_optimizer
+from fixtures import synthetic_player_pool, synthetic_players
+
+
+def best_time(function, repeat=3):
+    """
+    :param function: function to time (called without arguments)
+    :param repeat: int, number of times to call it
+    :return: float, fastest time in seconds
+    """
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time building DataFrames of growing player pools.')
+    parser.add_argument('--players', type=int, nargs='+', default=[500, 1000, 2000, 5000, 10000, 20000])
+    args = parser.parse_args()
+
+    roster = pd.DataFrame(columns=['full_name', 'team', 'position', 'points', 'player_object'])
+    print('%8s %16s %16s %16s' % ('players', 'players_to_df', 'greedy', 'exact'))
+    for n in args.players:
+        players = synthetic_players(n)
+        pool = synthetic_player_pool(n)
+
+        # Time per player should stay flat as the pool grows if the frames are built in linear time
+        results = [best_time(lambda: lineup_optimizer.players_to_df(players, 0)),
+                   best_time(lambda: lineup_optimizer.build_optimal_team(roster, pool)),
+                   best_time(lambda: lineup_optimizer.build_optimal_team(roster, pool, 'exact'))]
+        print('%8d %16s %16s %16s' % tuple([n] + ['%.1f us/player' % (t / n * 1e6) for t in results]))
@@ -0,0 +1,75 @@
+import argparse
+import os.path
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import numpy as np
+import pandas as pd
+import lineup_optimizer
+from draft_board import DraftBoard
+from fixtures import synthetic_player_pool
+
+
+def replay_draft(pool, teams=12, rounds=16, seat=0, rebuild=False):
+    """
+    This method replays a snake draft on a synthetic player pool. The other league members take the best available
+    player, and the user takes the top recommendation of the optimal roster. The time taken to update the
+    recommendation after every pick is recorded.
+
+    :param pool: pandas dataframe with all available players (including points)
+    :param teams: int, number of teams in the league
+    :param rounds: int, number of rounds in the draft
+    :param seat: int, draft position of the user (0 picks first)
+    :param rebuild: boolean, rebuild the optimal roster from scratch with build_optimal_team after every pick
+    :return: list of seconds taken for each recommendation, and the users final roster
+    """
+
+    board = DraftBoard(pool)
+    available = pool.sort_values(by='points', ascending=False)
+    roster = pd.DataFrame(columns=['full_name', 'team', 'position', 'points', 'player_object'])
+    latencies = []
+
+    for r in range(rounds):
+        order = range(teams) if r % 2 == 0 else range(teams - 1, -1, -1)
+        for team in order:
+            start = time.time()
+            if team == seat:
+                player_id = board.recommendations()[0]
+                board.pick(player_id)
+            else:
+                player_id = next(p for p in available.index if board.is_available(p))
+                board.remove(player_id)
+
+            # Compare against rebuilding the whole optimal roster after the pick
+            if rebuild:
+                available = available.drop(player_id)
+                if team == seat:
+                    roster.loc[player_id] = pool.loc[player_id]
+                lineup_optimizer.build_optimal_team(roster, available)
+            else:
+                board.optimal_roster()
+            latencies.append(time.time() - start)
+    return latencies, board.roster()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replay a full snake draft and time the recommendations.')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--rounds', type=int, default=16)
+    parser.add_argument('--rebuild', action='store_true', help='also time rebuilding with build_optimal_team')
+    args = parser.parse_args()
+
+    pool = synthetic_player_pool(args.players)
+    for rebuild in ([False, True] if args.rebuild else [False]):
+        latencies, roster = replay_draft(pool, args.teams, args.rounds, rebuild=rebuild)
+        latencies = np.array(latencies) * 1000
+        print('%s: %d picks, mean %.2f ms, p50 %.2f ms, p99 %.2f ms, max %.2f ms, final roster %.2f pts'
+              % ('rebuild' if rebuild else 'incremental', len(latencies), latencies.mean(),
+                 np.percentile(latencies, 50), np.percentile(latencies, 99), latencies.max(),
+                 roster['points'].sum()))
@@ -0,0 +1,40 @@
+import argparse
+import os.path
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import draft_simulator
+from bench_draft import replay_draft
+from fixtures import synthetic_player_pool
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time the headless draft simulator.')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--drafts', type=int, default=2000, help='drafts to run for each strategy')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--replays', type=int, default=3, help='drafts to replay with DraftBoard for comparison')
+    args = parser.parse_args()
+
+    pool = synthetic_player_pool(args.players)
+
+    # A draft replayed on the DataFrame-backed DraftBoard, with the greedy bots of the simulator
+    start = time.time()
+    for i in range(args.replays):
+        replay_draft(pool, seat=i % draft_simulator.DRAFT_TEAMS)
+    replayed = args.replays / (time.time() - start)
+    print('DraftBoard replay:        %7.1f drafts/s' % replayed)
+
+    for workers in args.workers:
+        start = time.time()
+        results = draft_simulator.simulate_drafts(pool, args.drafts, seed=0, workers=workers)
+        seconds = time.time() - start
+        print('simulator, %d worker(s):  %7.1f drafts/s (%d drafts in %.2f s, %.0fx the replay)'
+              % (workers, len(results.index) / seconds, len(results.index), seconds,
+                 len(results.index) / seconds / replayed))
+    print(draft_simulator.summarize_drafts(results).round(2).to_string())
@@ -0,0 +1,89 @@
+import argparse
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import numpy as np
+import pandas as pd
+import batch_leagues
+import lineup_optimizer
+import score_table
+
+
+def random_leagues(count, seed=0):
+    """
+    This method makes up league configs with different roster sizes, position limits and flex spots.
+
+    :param count: int, number of leagues
+    :param seed: int, seed for the random number generator
+    :return: list of LeagueConfigs
+    """
+
+    rng = np.random.RandomState(seed)
+    leagues = []
+    for i in range(count):
+        restrictions = dict((group, [low, low + rng.randint(0, 5)])
+                            for group, (low, high) in lineup_optimizer.TEAM_RESTRICTIONS.items())
+        flex_spots = rng.randint(0, 3)
+        capacity = sum(high for low, high in restrictions.values()) + flex_spots
+        minimum = sum(low for low, high in restrictions.values()) + flex_spots
+        roster_size = rng.randint(minimum, min(capacity, 20) + 1)
+        leagues.append(lineup_optimizer.LeagueConfig('league_'+str(i + 1), roster_size, restrictions,
+                                                     lineup_optimizer.FLEX_POSITIONS, flex_spots))
+    return leagues
+
+
+def simulate(players, N, table, seed):
+    """
+    :return: pandas dataframe with the simulated player pool (the same steps as batch_leagues.simulate_pool)
+    """
+    candidates, report = lineup_optimizer.prune_candidates(players, table, N)
+    return lineup_optimizer.players_to_df(candidates, N, table, seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare one simulation shared by many leagues with a run per league.')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--sims', type=int, default=1000)
+    parser.add_argument('--leagues', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--method', choices=['greedy', 'exact'], default='exact')
+    args = parser.parse_args()
+
+    synthetic_nflgame.configure(args.players)
+    players = sorted(synthetic_nflgame.players.values(), key=lambda p: p.player_id)
+    directory = tempfile.mkdtemp()
+    try:
+        table = score_table.build_score_table(lineup_optimizer.YEARS, lineup_optimizer.WEEKS,
+                                              lineup_optimizer._scoring_weights, directory)
+    finally:
+        shutil.rmtree(directory)
+    table.sampling_tables(lineup_optimizer._weighting)
+    leagues = random_leagues(args.leagues)
+
+    # A full run for each league: simulate the pool, then solve
+    start = time.time()
+    for league in leagues:
+        pool = simulate(players, args.sims, table, 0)
+        roster = pd.DataFrame(columns=pool.columns)
+        lineup_optimizer.build_optimal_team(roster, pool, args.method, league)
+    separate = time.time() - start
+    print('%d leagues, one run each:        %8.1f ms' % (len(leagues), 1000 * separate))
+
+    # One simulation shared by every league
+    for workers in args.workers:
+        start = time.time()
+        pool = simulate(players, args.sims, table, 0)
+        simulated = time.time() - start
+        rosters = batch_leagues.solve_leagues(leagues, pool, args.method, workers)
+        solved = time.time() - start - simulated
+        print('%d leagues, shared with %d worker(s): %8.1f ms (simulate %.1f ms, solve %.1f ms, %.1fx faster)'
+              % (len(leagues), workers, 1000 * (simulated + solved), 1000 * simulated, 1000 * solved,
+                 separate / (simulated + solved)))
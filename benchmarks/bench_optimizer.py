@@ -0,0 +1,52 @@
+import argparse
+import os.path
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import pandas as pd
+import lineup_optimizer
+from fixtures import synthetic_player_pool
+
+
+def run(n, seed=0, repeat=5):
+    """
+    This method compares the greedy and exact optimizers on a synthetic player pool.
+
+    :param n: int, number of players in the pool
+    :param seed: int, seed for the synthetic pool
+    :param repeat: int, number of times to time each optimizer (the best time is reported)
+    :return: dict of total points and seconds for each method
+    """
+
+    pool = synthetic_player_pool(n, seed)
+    roster = pd.DataFrame(columns=['full_name', 'team', 'position', 'points', 'player_object'])
+
+    result = {'players': n}
+    for method in ['greedy', 'exact']:
+        times = []
+        for i in range(repeat):
+            start = time.time()
+            team = lineup_optimizer.build_optimal_team(roster, pool, method)
+            times.append(time.time() - start)
+        result[method+'_points'] = float(team['points'].sum())
+        result[method+'_seconds'] = min(times)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare the greedy and exact lineup optimizers.')
+    parser.add_argument('--players', type=int, nargs='+', default=[500, 2000])
+    parser.add_argument('--seeds', type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.players:
+        for seed in range(args.seeds):
+            r = run(n, seed)
+            print('%5d players, seed %d: greedy %.2f pts in %.1f ms, exact %.2f pts in %.1f ms'
+                  % (n, seed, r['greedy_points'], r['greedy_seconds'] * 1000, r['exact_points'],
+                     r['exact_seconds'] * 1000))
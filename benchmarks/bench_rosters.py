@@ -0,0 +1,56 @@
+import argparse
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import pandas as pd
+import lineup_optimizer
+import score_table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time the batched simulation of whole rosters.')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--sims', type=int, default=1000, help='weeks drawn for each roster')
+    parser.add_argument('--rosters', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--one-by-one', type=int, default=100, help='rosters to also simulate one call at a time')
+    args = parser.parse_args()
+
+    synthetic_nflgame.configure(args.players)
+    players = [p for p in synthetic_nflgame.players.values() if p.position in lineup_optimizer.FF_POSITIONS]
+    directory = tempfile.mkdtemp()
+    try:
+        table = score_table.build_score_table(lineup_optimizer.YEARS, lineup_optimizer.WEEKS,
+                                              lineup_optimizer._scoring_weights, directory)
+    finally:
+        shutil.rmtree(directory)
+    pool = lineup_optimizer.players_to_df(players, args.sims, table, 0)
+    roster = pd.DataFrame(columns=['full_name', 'team', 'position', 'points', 'variance', 'player_object'])
+
+    for count in args.rosters:
+        start = time.time()
+        rosters = lineup_optimizer.candidate_rosters(roster, pool, count, 0)
+        built = time.time() - start
+
+        start = time.time()
+        distributions = lineup_optimizer.simulate_rosters(rosters, args.sims, table, 0)
+        batched = time.time() - start
+        print('%5d rosters: built in %7.1f ms, simulated %d weeks each in %7.1f ms (%.0f rosters/s)'
+              % (len(rosters), 1000 * built, args.sims, 1000 * batched, len(rosters) / batched))
+
+    start = time.time()
+    for r in rosters[:args.one_by_one]:
+        lineup_optimizer.simulate_rosters([r], args.sims, table, 0)
+    one_by_one = time.time() - start
+    print('%5d rosters one call at a time: %7.1f ms (%.0f rosters/s)'
+          % (min(args.one_by_one, len(rosters)), 1000 * one_by_one, min(args.one_by_one, len(rosters)) / one_by_one))
+
+    best = distributions.sort_values(by='mean', ascending=False).iloc[:5]
+    print(best.round(2).to_string())
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os.path
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+try:
+    from httplib import HTTPConnection
+except ImportError:
+    from http.client import HTTPConnection
+
+import numpy as np
+from draft_server import DraftServer, DraftService
+from fixtures import synthetic_player_pool
+
+
+def post_picks(port, player_ids, latencies):
+    """
+    This method posts a 'drafted' event for each player over one connection, recording how long each updated
+    recommendation took to come back.
+
+    :param port: int, port of the draft server
+    :param player_ids: list of player_ids to draft
+    :param latencies: list the seconds taken for each request are appended to
+    """
+
+    connection = HTTPConnection('127.0.0.1', port)
+    for player_id in player_ids:
+        start = time.time()
+        connection.request('POST', '/drafted', json.dumps({'player_id': player_id}),
+                           {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.time() - start)
+    connection.close()
+
+
+def subscribe(port, received, stop):
+    """
+    This method follows the event stream of the draft server and counts the recommendations pushed to it.
+
+    :param port: int, port of the draft server
+    :param received: list the version of every pushed recommendation is appended to
+    :param stop: threading.Event, set once the subscriber should stop
+    """
+
+    connection = HTTPConnection('127.0.0.1', port)
+    connection.request('GET', '/events')
+    response = connection.getresponse()
+    while not stop.is_set():
+        line = response.fp.readline()
+        if not line:
+            break
+        if line.startswith(b'data: '):
+            received.append(json.loads(line[6:].decode('utf-8'))['version'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the live draft server with concurrent clients.')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=8, help='number of clients posting picks at once')
+    parser.add_argument('--picks', type=int, default=25, help='number of picks posted by each client')
+    parser.add_argument('--subscribers', type=int, default=4, help='number of clients following the event stream')
+    args = parser.parse_args()
+
+    pool = synthetic_player_pool(args.players)
+    server = DraftServer(('127.0.0.1', 0), DraftService(pool))
+    port = server.server_address[1]
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    stop = threading.Event()
+    streams = [[] for _ in range(args.subscribers)]
+    subscribers = [threading.Thread(target=subscribe, args=(port, received, stop)) for received in streams]
+    for subscriber in subscribers:
+        subscriber.daemon = True
+        subscriber.start()
+    time.sleep(0.2)
+
+    # Every client drafts its own share of the best players, so the optimal roster changes on most picks
+    ranked = list(pool.sort_values(by='points', ascending=False).index)
+    latencies = []
+    clients = [threading.Thread(target=post_picks, args=(port, ranked[c::args.clients][:args.picks], latencies))
+               for c in range(args.clients)]
+    start = time.time()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.time() - start
+
+    time.sleep(0.2)
+    stop.set()
+    server.shutdown()
+    server.server_close()
+    for subscriber in subscribers:
+        subscriber.join(1.0)
+
+    latencies = np.array(latencies) * 1000
+    print('%d picks from %d clients in %.2f s (%.0f picks/s)'
+          % (len(latencies), args.clients, elapsed, len(latencies) / elapsed))
+    print('recommendation latency: mean %.2f ms, p50 %.2f ms, p99 %.2f ms, max %.2f ms'
+          % (latencies.mean(), np.percentile(latencies, 50), np.percentile(latencies, 99), latencies.max()))
+    if streams:
+        print('subscribers received %s updates (final version %d)'
+              % ('/'.join(str(len(received)) for received in streams), server.service.version))
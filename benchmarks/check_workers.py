@@ -0,0 +1,49 @@
+import argparse
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import numpy as np
+import lineup_optimizer
+import score_table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check that a process pool simulates the same means as one process.')
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--sims', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    synthetic_nflgame.configure(args.players)
+    players = sorted(synthetic_nflgame.players.values(), key=lambda p: p.player_id)
+    players = [p for p in players if p.position in lineup_optimizer.FF_POSITIONS]
+
+    # A table of other seasons than the default, in a folder without weekly_scores.npz, so the workers can only get
+    # it from the main process
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        os.chdir(directory)
+        table = score_table.build_score_table(lineup_optimizer.YEARS[1:3], lineup_optimizer.WEEKS,
+                                              lineup_optimizer._scoring_weights, os.path.join(directory, 'store'))
+        single = lineup_optimizer.simulate_players(players, args.sims, table, 0)
+        pooled = lineup_optimizer.simulate_players(players, args.sims, table, 0, args.workers)
+        leftover = sorted(os.listdir(directory))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory)
+
+    same = all(np.allclose(a, b, rtol=0, atol=0, equal_nan=True) for a, b in zip(single, pooled))
+    print('%d players, %d workers: %s' % (len(players), args.workers, 'same means' if same else 'DIFFERENT means'))
+    if leftover != ['store']:
+        print('workers wrote to the working directory: '+', '.join(leftover))
+        same = False
+    sys.exit(0 if same else 1)
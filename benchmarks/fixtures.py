@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+# Share of each position in a synthetic player pool, and the mean/spread of the points those players score
+POSITION_SHARES = {'QB': 0.07, 'RB': 0.12, 'WR': 0.17, 'TE': 0.09, 'K': 0.03, 'DB': 0.18, 'LB': 0.14, 'DE': 0.08,
+                   'OT': 0.06, 'OG': 0.04, 'C': 0.02}
+POSITION_POINTS = {'QB': (12.0, 5.0), 'RB': (7.0, 4.0), 'WR': (7.0, 4.0), 'TE': (5.0, 3.0), 'K': (7.0, 1.5),
+                   'DB': (2.0, 1.5), 'LB': (2.0, 1.5), 'DE': (1.5, 1.0)}
+TEAMS = ['ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET', 'GB', 'HOU', 'IND', 'JAX', 'KC',
+         'LA', 'LAC', 'MIA', 'MIN', 'NE', 'NO', 'NYG', 'NYJ', 'OAK', 'PHI', 'PIT', 'SEA', 'SF', 'TB', 'TEN', 'WAS']
+
+
+def synthetic_player_pool(n, seed=0):
+    """
+    This method builds a DataFrame shaped like the output of players_to_df for n made up players, so that the
+    optimization and draft code can be benchmarked without any nflgame data.
+
+    :param n: int, number of players in the pool
+    :param seed: int, seed for the random number generator
+    :return: pandas dataframe with information on each player, indexed by player_id
+    """
+
+    rng = np.random.RandomState(seed)
+    positions = list(POSITION_SHARES)
+    shares = np.array([POSITION_SHARES[pos] for pos in positions])
+    position = rng.choice(positions, size=n, p=shares / shares.sum())
+
+    # Players at positions that can't be used in fantasy football never play in the sampled weeks
+    points = np.full(n, -np.inf)
+    for pos, (mean, spread) in POSITION_POINTS.items():
+        mask = position == pos
+        points[mask] = np.maximum(0.0, rng.normal(mean, spread, size=mask.sum()))
+
+    player_ids = ['00-%07d' % i for i in range(n)]
+    df = pd.DataFrame({'full_name': ['Player %d' % i for i in range(n)],
+                       'team': rng.choice(TEAMS, size=n),
+                       'position': position,
+                       'points': points,
+                       'player_object': player_ids},
+                      index=player_ids, columns=['full_name', 'team', 'position', 'points', 'player_object'])
+    df.index.name = 'player_id'
+    return df
+
+
+class SyntheticPlayer(object):
+    """
+    This class is a stand-in for nflgame's Player with the attributes this program uses.
+    """
+
+    def __init__(self, player_id, first_name, last_name, team, position, number):
+        self.player_id = player_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.full_name = first_name+' '+last_name
+        self.name = self.full_name
+        self.team = team
+        self.position = position
+        self.number = number
+        self.status = 'ACT'
+
+    def __repr__(self):
+        return '%s (%s, %s)' % (self.full_name, self.position, self.team)
+
+
+def synthetic_players(n, seed=0):
+    """
+    This method builds n made up Player objects, with the same ids, names, teams and positions as the rows of
+    synthetic_player_pool(n, seed).
+
+    :param n: int, number of players
+    :param seed: int, seed for the random number generator
+    :return: list of SyntheticPlayer objects
+    """
+
+    pool = synthetic_player_pool(n, seed)
+    return [SyntheticPlayer(player_id, 'Player', str(i), team, position, i % 100)
+            for i, (player_id, team, position) in enumerate(zip(pool.index, pool['team'], pool['position']))]
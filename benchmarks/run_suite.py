@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+import os.path
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every case runs against the synthetic seasons, so nflgame is replaced before anything imports it
+import synthetic_nflgame
+sys.modules['nflgame'] = synthetic_nflgame
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+import lineup_optimizer
+import score_table
+from draft_board import DraftBoard
+from live_draft import format_optimal_roster
+
+
+class Context(object):
+    """
+    This class builds (once, when first needed) the inputs the cases share: the synthetic players, the score table
+    built from their seasons, and a simulated player pool.
+    """
+
+    def __init__(self, players, N, seed):
+        """
+        :param players: int, number of players in the synthetic database
+        :param N: int, number of simulations to run for each player
+        :param seed: int, seed for the synthetic data and the simulations
+        """
+
+        self.N = N
+        self.seed = seed
+        synthetic_nflgame.configure(players, seed)
+        self.players = sorted(synthetic_nflgame.players.values(), key=lambda p: p.player_id)
+        self.fantasy_players = [p for p in self.players if p.position in lineup_optimizer.FF_POSITIONS]
+        self._table = None
+        self._pool = None
+
+    def table(self):
+        if self._table is None:
+            directory = tempfile.mkdtemp()
+            try:
+                self._table = build_table(directory)
+            finally:
+                shutil.rmtree(directory)
+        return self._table
+
+    def pool(self):
+        if self._pool is None:
+            self._pool = lineup_optimizer.players_to_df(self.players, self.N, self.table(), self.seed)
+        return self._pool
+
+
+def build_table(directory):
+    """
+    :param directory: string, folder for the weekly stats store
+    :return: ScoreTable of the synthetic seasons
+    """
+    return score_table.build_score_table(lineup_optimizer.YEARS, lineup_optimizer.WEEKS,
+                                         lineup_optimizer._scoring_weights, directory)
+
+
+def empty_roster():
+    return pd.DataFrame(columns=['full_name', 'team', 'position', 'points', 'player_object'])
+
+
+# Each case takes the Context and returns the function to time, along with the number of calls of the hot path that
+# one run of it makes. Cases that don't depend on the number of simulations are only run once per pool size.
+
+def case_build_score_table(context):
+    def run():
+        directory = tempfile.mkdtemp()
+        try:
+            build_table(directory)
+        finally:
+            shutil.rmtree(directory)
+    return run, 1
+
+
+def case_score_to_fantasy_points(context):
+    stats = synthetic_nflgame.combine_game_stats(synthetic_nflgame.games(2017, 1))
+
+    def run():
+        for person in stats:
+            lineup_optimizer.score_to_fantasy_points(person)
+    return run, len(stats)
+
+
+def case_get_player_score(context):
+    table = context.table()
+    players = context.fantasy_players[:200]
+    rng = np.random.RandomState(context.seed)
+
+    def run():
+        for player in players:
+            lineup_optimizer.get_player_score(player, table, rng)
+    return run, len(players)
+
+
+def case_get_player_score_nflgame(context):
+    players = context.fantasy_players[:5]
+    rng = np.random.RandomState(context.seed)
+
+    def run():
+        for player in players:
+            lineup_optimizer.get_player_score(player, None, rng)
+    return run, len(players)
+
+
+def case_simulate(context):
+    table = context.table()
+    team = context.fantasy_players[:lineup_optimizer.ROSTER_SIZE]
+
+    def run():
+        lineup_optimizer.simulate(team, context.N, table, context.seed)
+    return run, len(team)
+
+
+def case_players_to_df(context):
+    table = context.table()
+
+    def run():
+        lineup_optimizer.players_to_df(context.players, context.N, table, context.seed)
+    return run, len(context.players)
+
+
+def case_can_add_player(context):
+    pool = context.pool()
+    roster = pool[pool['position'].isin(['QB', 'RB', 'WR'])].iloc[:8]
+    positions = list(pool['position'].values[:1000])
+
+    def run():
+        for position in positions:
+            lineup_optimizer.can_add_player(roster, position)
+    return run, len(positions)
+
+
+def case_build_optimal_team(context):
+    pool = context.pool()
+
+    def run():
+        lineup_optimizer.build_optimal_team(empty_roster(), pool)
+    return run, 1
+
+
+def case_build_optimal_team_exact(context):
+    pool = context.pool()
+
+    def run():
+        lineup_optimizer.build_optimal_team(empty_roster(), pool, 'exact')
+    return run, 1
+
+
+def case_validate_player(context):
+    names = [p.full_name for p in context.players[:200]]
+
+    # Misspelled names go through the suggestions
+    names += [name.replace('Player', 'Playr') for name in names[:20]]
+
+    def run():
+        for name in names:
+            lineup_optimizer.validate_player(name)
+    return run, len(names)
+
+
+def case_live_draft(context, teams=12, rounds=16):
+    pool = context.pool()
+    names = dict(zip(pool.index, pool['full_name']))
+    ranked = list(pool.sort_values(by='points', ascending=False).index)
+
+    def run():
+        # Replay a snake draft the way live_draft.py takes it in: every pick is typed in by name, and the optimal
+        # roster is printed before each of the users picks (small pools may run out of players to pick)
+        board = DraftBoard(pool)
+        for r in range(rounds):
+            for team in (range(teams) if r % 2 == 0 else range(teams - 1, -1, -1)):
+                if team == 0:
+                    tabulate(format_optimal_roster(board.roster(), board.optimal_roster()), headers='keys',
+                             tablefmt='psql')
+                    recommendations = board.recommendations()
+                    if recommendations:
+                        board.pick(lineup_optimizer.validate_player(names[recommendations[0]]).player_id)
+                else:
+                    player_id = next((p for p in ranked if board.is_available(p)), None)
+                    if player_id is not None:
+                        board.remove(lineup_optimizer.validate_player(names[player_id]).player_id)
+    return run, teams * rounds
+
+
+# Cases by name, and whether they depend on the number of simulations
+CASES = [('build_score_table', case_build_score_table, False),
+         ('score_to_fantasy_points', case_score_to_fantasy_points, False),
+         ('get_player_score', case_get_player_score, False),
+         ('get_player_score_nflgame', case_get_player_score_nflgame, False),
+         ('simulate', case_simulate, True),
+         ('players_to_df', case_players_to_df, True),
+         ('can_add_player', case_can_add_player, False),
+         ('build_optimal_team', case_build_optimal_team, False),
+         ('build_optimal_team_exact', case_build_optimal_team_exact, False),
+         ('validate_player', case_validate_player, False),
+         ('live_draft', case_live_draft, False)]
+
+
+def peak_memory_mb():
+    """
+    :return: float, peak resident memory of this process so far, in MB (None where it can't be measured, e.g. Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 ** 2 if sys.platform == 'darwin' else 1024.0)
+
+
+def run_case(name, players, N, seed, repeat):
+    """
+    This method times one case. It is meant to run in a fresh process, so that the peak memory belongs to the case alone.
+
+    :param name: string, name of the case
+    :param players: int, number of players in the synthetic database
+    :param N: int, number of simulations to run for each player
+    :param seed: int, seed for the synthetic data and the simulations
+    :param repeat: int, number of timed runs
+    :return: dict with the timings and memory use of the case
+    """
+
+    case = dict((case_name, function) for case_name, function, uses_sims in CASES)[name]
+    context = Context(players, N, seed)
+    run, calls = case(context)
+    setup_memory = peak_memory_mb()
+
+    # Keep prints (e.g. suggestions for misspelled names) out of the results
+    stdout = sys.stdout
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            for i in range(repeat):
+                start = time.time()
+                run()
+                times.append(time.time() - start)
+        finally:
+            sys.stdout = stdout
+
+    return {'case': name, 'players': players, 'N': N, 'repeat': repeat, 'calls': calls,
+            'first_seconds': times[0], 'best_seconds': min(times), 'mean_seconds': float(np.mean(times)),
+            'seconds_per_call': min(times) / calls, 'setup_peak_memory_mb': setup_memory,
+            'peak_memory_mb': peak_memory_mb()}
+
+
+def run_suite(cases, pool_sizes, sims, seed, repeat):
+    """
+    This method runs every case (each in its own process) for every pool size, and every number of simulations for the
+    cases that depend on it.
+
+    :param cases: list of case names
+    :param pool_sizes: list of ints, numbers of players in the synthetic database
+    :param sims: list of ints, numbers of simulations
+    :param seed: int, seed for the synthetic data and the simulations
+    :param repeat: int, number of timed runs of each case
+    :return: list of result dicts (see run_case)
+    """
+
+    uses_sims = dict((name, flag) for name, function, flag in CASES)
+    results = []
+    for players in pool_sizes:
+        for name in cases:
+            for N in (sims if uses_sims[name] else sims[:1]):
+                output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--case', name,
+                                                  '--players', str(players), '--sims', str(N), '--seed', str(seed),
+                                                  '--repeat', str(repeat), '--single'])
+                results.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+                memory = results[-1]['peak_memory_mb']
+                sys.stderr.write('%-26s %6d players, N=%-6d %10.2f ms %8s MB\n'
+                                 % (name, players, N, results[-1]['best_seconds'] * 1000,
+                                    'n/a' if memory is None else '%.1f' % memory))
+    return results
+
+
+if __name__ == "__main__":
+    names = [name for name, function, uses_sims in CASES]
+    parser = argparse.ArgumentParser(description='Time the simulation, optimization and draft hot paths on synthetic '
+                                                 'data, and write the results as JSON.')
+    parser.add_argument('--players', type=int, nargs='+', default=[500, 2000], help='sizes of the player database')
+    parser.add_argument('--sims', type=int, nargs='+', default=[100, 1000], help='numbers of simulations (N)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each case (the best is reported)')
+    parser.add_argument('--case', choices=names, nargs='+', default=names, help='cases to run (default: all)')
+    parser.add_argument('--output', help='file to write the JSON results to (default: stdout)')
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # The suite runs each case in a process of its own with --single
+    if args.single:
+        print(json.dumps(run_case(args.case[0], args.players[0], args.sims[0], args.seed, args.repeat)))
+    else:
+        report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  'python': platform.python_version(),
+                  'numpy': np.__version__,
+                  'pandas': pd.__version__,
+                  'platform': platform.platform(),
+                  'seed': args.seed,
+                  'results': run_suite(args.case, args.players, args.sims, args.seed, args.repeat)}
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        else:
+            print(json.dumps(report, indent=2, sort_keys=True))
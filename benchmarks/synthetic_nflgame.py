@@ -0,0 +1,171 @@
+# A made up stand-in for the parts of nflgame this program uses (players, games, games_gen, combine_game_stats, find and
+# sched), so that the benchmarks can run offline. Call configure and put it in sys.modules['nflgame'] before lineup_optimizer is
+# imported. The players are those of fixtures.synthetic_players, and every week is generated from a seed (and rebuilt
+# every time it is requested, like nflgame does), so every run sees exactly the same seasons.
+
+import numpy as np
+from fixtures import synthetic_players, TEAMS
+
+
+# Seasons that have been "played", and the number of weeks in each
+SEASONS = [2014, 2015, 2016, 2017]
+WEEKS = 17
+
+# Share of the players at each position that play in a given week
+PLAY_RATE = 0.85
+
+# Mean of each stat per game, for the positions that put up stats (everyone else plays without earning any)
+POSITION_STATS = {'QB': {'passing_yds': 240.0, 'passing_tds': 1.6, 'passing_ints': 0.8, 'passing_twoptm': 0.05,
+                         'rushing_yds': 15.0, 'rushing_tds': 0.15, 'fumbles_lost': 0.2},
+                  'RB': {'rushing_yds': 55.0, 'rushing_tds': 0.4, 'rushing_twoptm': 0.03, 'receiving_rec': 2.5,
+                         'receiving_yds': 20.0, 'receiving_tds': 0.1, 'fumbles_lost': 0.1},
+                  'WR': {'receiving_rec': 4.0, 'receiving_yds': 50.0, 'receiving_tds': 0.35, 'receiving_twoptm': 0.03,
+                         'rushing_yds': 2.0, 'kickret_tds': 0.01, 'puntret_tds': 0.01, 'fumbles_lost': 0.05},
+                  'TE': {'receiving_rec': 3.0, 'receiving_yds': 32.0, 'receiving_tds': 0.25, 'fumbles_lost': 0.03},
+                  'K': {'kicking_fgmissed': 0.3, 'kicking_fgb': 0.02},
+                  'DB': {'defense_int': 0.08, 'defense_int_tds': 0.01, 'fumbles_rec': 0.03},
+                  'LB': {'defense_int': 0.03, 'defense_sk': 0.15, 'fumbles_rec': 0.04, 'fumble_rec_tds': 0.005},
+                  'DE': {'defense_sk': 0.4, 'fumbles_rec': 0.04, 'defense_safe': 0.005, 'defense_fgblk': 0.005}}
+
+# Database of every player, by player_id (see configure)
+players = {}
+
+_seed = 0
+_ability = {}
+
+
+def configure(n, seed=0):
+    """
+    This method creates the player database.
+
+    :param n: int, number of players
+    :param seed: int, seed for the players and their stats
+    """
+
+    global players, _seed, _ability
+    _seed = seed
+    players = dict((p.player_id, p) for p in synthetic_players(n, seed))
+
+    # Some players are simply better than others, every week
+    rng = np.random.RandomState([seed, 1])
+    ability = rng.lognormal(0.0, 0.4, size=len(players))
+    _ability = dict(zip(sorted(players), ability))
+
+
+class PlayerStats(object):
+    """
+    This class is a stand-in for nflgame's PlayerStats: the stats one player put up in a game.
+    """
+
+    def __init__(self, player, stats):
+        self.player = player
+        self.playerid = player.player_id
+        self.name = player.full_name
+        self._stats = stats
+
+    def __getattr__(self, stat):
+        if stat.startswith('_'):
+            raise AttributeError(stat)
+        return self._stats.get(stat, 0)
+
+
+class Game(object):
+    """
+    This class is a stand-in for nflgame's Game, with the stats of every player that played in it.
+    """
+
+    def __init__(self, eid, home, away, players):
+        self.eid = eid
+        self.home = home
+        self.away = away
+        self.players = players
+
+    def game_over(self):
+        return True
+
+
+def _eid(year, week, number):
+    return '%d%02d%02d' % (year, week, number)
+
+
+class Schedule(object):
+    """
+    This class is a stand-in for nflgame.sched, with every game of the seasons by eid.
+    """
+
+    def __init__(self):
+        self.games = {}
+        for year in SEASONS:
+            for week in range(1, WEEKS + 1):
+                for number in range(len(TEAMS) // 2):
+                    eid = _eid(year, week, number)
+                    self.games[eid] = {'eid': eid, 'year': year, 'week': week, 'season_type': 'REG'}
+
+
+sched = Schedule()
+
+
+def _week_stats(year, week):
+    """
+    :param year: int, season
+    :param week: int, week of the season
+    :return: dict mapping each team to the PlayerStats of its players that played that week
+    """
+
+    rng = np.random.RandomState([_seed, year, week])
+    teams = dict((team, []) for team in TEAMS)
+    for player_id in sorted(players):
+        player = players[player_id]
+        played = rng.random_sample() < PLAY_RATE
+        means = POSITION_STATS.get(player.position, {})
+        counts = rng.poisson([means[stat] * _ability[player_id] for stat in sorted(means)]) if means else []
+        if played:
+            stats = dict((stat, int(count)) for stat, count in zip(sorted(means), counts) if count)
+            teams[player.team].append(PlayerStats(player, stats))
+    return teams
+
+
+def games(year, week=None):
+    """
+    :param year: int, season
+    :param week: int, week of the season
+    :return: list of Games played that week (empty if the week was not played)
+    """
+
+    if year not in SEASONS or week is None or not 1 <= week <= WEEKS:
+        return []
+    teams = _week_stats(year, week)
+    order = np.random.RandomState([_seed, year, week, 1]).permutation(TEAMS)
+    return [Game(_eid(year, week, number), home, away, teams[home] + teams[away])
+            for number, (home, away) in enumerate(zip(order[::2], order[1::2]))]
+
+
+def games_gen(year, week=None):
+    """
+    :param year: int, season
+    :param week: int, week of the season
+    :return: generator of Games played that week (None if the week was not played)
+    """
+
+    week_games = games(year, week)
+    if not week_games:
+        return None
+    return iter(week_games)
+
+
+def combine_game_stats(games):
+    """
+    :param games: list of Games
+    :return: list of the PlayerStats of every player in the games
+    """
+    return [person for game in games for person in game.players]
+
+
+def find(name, team=None):
+    """
+    :param name: string, full name of a player (case insensitive)
+    :param team: string, team of the player (optional)
+    :return: list of Players with that name
+    """
+    return [p for p in players.values()
+            if p.full_name.lower() == name.lower() and (team is None or p.team == team)]
@@ -0,0 +1,132 @@
+import numpy as np
+from lineup_optimizer import RosterState
+
+
+class DraftBoard(object):
+    """
+    This class holds the state of a live draft: the players that are still available (presorted by the points they
+    earned in the MC simulation), the users roster, and the optimal roster that build_optimal_team would build from
+    them. When a player is drafted, the optimal roster is repaired from the spot that player held instead of being
+    rebuilt from scratch.
+    """
+
+    def __init__(self, available_players):
+        """
+        :param available_players: pandas dataframe with all available players (including points earned in MC simulation)
+        """
+
+        # Sort the players in descending order by the points they earned in the MC simulation, once
+        self.players = available_players.sort_values(by='points', ascending=False)
+        self._positions = self.players['position'].values
+        self._rank = dict((player_id, rank) for rank, player_id in enumerate(self.players.index))
+        self._available = np.ones(len(self.players.index), dtype=bool)
+
+        # Ranks of the players on the users roster, and the roster rules they use up
+        self._roster = []
+        self._state = RosterState()
+
+        # Ranks of the players build_optimal_team would add to the users roster (in the order they are added), and the
+        # state of the roster before each of them was added
+        self._optimal = []
+        self._optimal_states = []
+        self._fill(0, self._state.copy())
+
+    def _fill(self, start, state):
+        """
+        This method continues the greedy build of the optimal roster: moving down the available players from rank
+        start, every player that can legally be added is added until the roster is full.
+
+        :param start: int, rank to start looking from
+        :param state: RosterState of the roster built so far
+        """
+
+        for rank in range(start, len(self._positions)):
+            if state.remaining <= 0:
+                return
+            if self._available[rank] and state.can_add(self._positions[rank]):
+                self._optimal.append(rank)
+                self._optimal_states.append(state.copy())
+                state.add(self._positions[rank])
+
+    def is_available(self, player_id):
+        """
+        :param player_id: string, id of the player
+        :return: boolean, whether the player is in the pool and has not been drafted yet
+        """
+        rank = self._rank.get(player_id)
+        return rank is not None and self._available[rank]
+
+    def can_pick(self, player_id):
+        """
+        :param player_id: string, id of the player
+        :return: boolean, whether the user can draft the player and still have a legal roster
+        """
+        return self.is_available(player_id) and self._state.can_add(self._positions[self._rank[player_id]])
+
+    def remove(self, player_id):
+        """
+        This method marks a player as drafted by another league member. If the player was on the optimal roster, the
+        roster is refilled starting from the spot that player held.
+
+        :param player_id: string, id of the drafted player
+        :return: boolean, whether the player was available
+        """
+
+        if not self.is_available(player_id):
+            return False
+        rank = self._rank[player_id]
+        self._available[rank] = False
+
+        # Players ranked above the drafted player were picked (or skipped) exactly as before, so only the rest of the
+        # roster has to be refilled
+        if rank in self._optimal:
+            spot = self._optimal.index(rank)
+            state = self._optimal_states[spot]
+            del self._optimal[spot:]
+            del self._optimal_states[spot:]
+            self._fill(rank + 1, state)
+        return True
+
+    def pick(self, player_id):
+        """
+        This method adds a player to the users roster, and rebuilds the optimal roster around it.
+
+        :param player_id: string, id of the picked player
+        :return: boolean, whether the player could be legally added
+        """
+
+        if not self.can_pick(player_id):
+            return False
+        rank = self._rank[player_id]
+        self._available[rank] = False
+        self._roster.append(rank)
+        self._state.add(self._positions[rank])
+
+        del self._optimal[:]
+        del self._optimal_states[:]
+        self._fill(0, self._state.copy())
+        return True
+
+    def roster_full(self):
+        """
+        :return: boolean, whether the users roster has no open spots left
+        """
+        return self._state.remaining <= 0
+
+    def roster(self):
+        """
+        :return: pandas dataframe with the players on the users roster
+        """
+        return self.players.iloc[self._roster]
+
+    def optimal_roster(self):
+        """
+        :return: pandas dataframe with the users roster filled out by the best available players
+        """
+        return self.players.iloc[self._roster + self._optimal]
+
+    def recommendations(self):
+        """
+        :return: list of player_ids of the best players to pick next (the players on the optimal roster)
+        """
+        return list(self.players.index[self._optimal])
@@ -0,0 +1,242 @@
+import json
+import math
+import socket
+import sys
+import threading
+import time
+from draft_board import DraftBoard
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+
+class DraftService(object):
+    """
+    This class holds the state of a live draft for the draft server: the available players, the users roster and the
+    optimal roster (kept up to date by a DraftBoard). Pick events from any number of clients are applied one at a time
+    under a lock, and every change bumps a version number that subscribers wait on.
+    """
+
+    def __init__(self, available_players):
+        """
+        :param available_players: pandas dataframe with all available players (including points earned in MC simulation)
+        """
+
+        self.board = DraftBoard(available_players)
+        self.version = 0
+        self.closed = False
+
+        # Build the record sent for each player once, rather than on every update. Players that never played have
+        # -inf points, which JSON can't hold, so they are sent without points (null).
+        self._records = {}
+        self._names = {}
+        columns = available_players[['full_name', 'team', 'position', 'points']].values
+        for player_id, (name, team, position, points) in zip(available_players.index, columns):
+            points = float(points)
+            self._records[player_id] = dict(player_id=player_id, full_name=name, team=team, position=position,
+                                            points=None if math.isinf(points) or math.isnan(points) else points)
+            self._names.setdefault(str(name).lower(), []).append(player_id)
+        self._changed = threading.Condition(threading.Lock())
+        self._recommendation = self._snapshot()
+
+    def resolve(self, event):
+        """
+        This method finds the player an event refers to, either by player_id or by (unique) full name.
+
+        :param event: dict with a 'player_id' or a 'name'
+        :return: string, player_id (None if the player could not be found)
+        """
+        if event.get('player_id'):
+            return event['player_id']
+        matches = self._names.get(str(event.get('name', '')).lower(), [])
+        return matches[0] if len(matches) == 1 else None
+
+    def _snapshot(self):
+        """
+        :return: dict with the version, the users roster and the optimal roster (as lists of player records)
+        """
+        return {'version': self.version,
+                'roster': [self._records[player_id] for player_id in self.board.roster().index],
+                'optimal': [self._records[player_id] for player_id in self.board.optimal_roster().index],
+                'complete': self.board.roster_full()}
+
+    def apply(self, kind, event):
+        """
+        This method applies a pick event and returns the updated recommendation.
+
+        :param kind: string, 'drafted' (picked by another league member) or 'pick' (picked by the user)
+        :param event: dict with a 'player_id' or a 'name'
+        :return: dict with 'ok', an 'error' message if the event was rejected, and the current recommendation
+        """
+
+        with self._changed:
+            player_id = self.resolve(event)
+            if player_id is None:
+                return {'ok': False, 'error': 'Could not find player', 'recommendation': self._recommendation}
+            if kind == 'drafted':
+                ok = self.board.remove(player_id)
+                error = 'Player is not available'
+            else:
+                ok = self.board.pick(player_id)
+                error = 'Cannot add player'
+            if ok:
+                self.version += 1
+                self._recommendation = self._snapshot()
+                self._changed.notify_all()
+            return {'ok': ok, 'error': None if ok else error, 'recommendation': self._recommendation}
+
+    def recommendation(self):
+        """
+        :return: dict with the current recommendation (see _snapshot)
+        """
+        with self._changed:
+            return self._recommendation
+
+    def wait(self, version, timeout):
+        """
+        This method blocks until the recommendation is newer than version (or the timeout runs out).
+
+        :param version: int, version the subscriber has already seen
+        :param timeout: float, seconds to wait
+        :return: dict with the current recommendation
+        """
+        deadline = time.time() + timeout
+        with self._changed:
+            while self.version <= version and not self.closed and time.time() < deadline:
+                self._changed.wait(deadline - time.time())
+            return self._recommendation
+
+    def close(self):
+        """
+        This method wakes up every subscriber so that their event streams can end.
+        """
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+
+class DraftRequestHandler(BaseHTTPRequestHandler):
+    """
+    This class handles the requests of the draft server:
+
+    POST /drafted   {"player_id": ...} or {"name": ...}, a player picked by another league member
+    POST /pick      {"player_id": ...} or {"name": ...}, a player picked by the user
+    GET  /roster    the current users roster and optimal roster
+    GET  /events    a stream (server-sent events) of the recommendation every time it changes
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    # Send small responses straight away instead of waiting to fill a packet
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, allow_nan=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/roster':
+            self._send_json(200, service.recommendation())
+        elif self.path == '/events':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            version = -1
+            try:
+                while not service.closed:
+                    recommendation = service.wait(version, 15.0)
+                    if recommendation['version'] == version:
+                        self.wfile.write(b': keep-alive\n\n')
+                    else:
+                        version = recommendation['version']
+                        self.wfile.write(b'data: '+json.dumps(recommendation, allow_nan=False).encode('utf-8')+b'\n\n')
+                    self.wfile.flush()
+            except (IOError, OSError):
+                pass
+            self.close_connection = True
+        else:
+            self._send_json(404, {'error': 'Unknown path'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            event = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        except ValueError:
+            self._send_json(400, {'error': 'Body must be JSON'})
+            return
+        if not isinstance(event, dict) or not all(isinstance(event.get(key) or '', string_types)
+                                                  for key in ('player_id', 'name')):
+            self._send_json(400, {'error': 'Body must be an object with a string player_id or name'})
+            return
+        if self.path == '/drafted':
+            result = self.server.service.apply('drafted', event)
+        elif self.path == '/pick':
+            result = self.server.service.apply('pick', event)
+        else:
+            self._send_json(404, {'error': 'Unknown path'})
+            return
+        self._send_json(200 if result['ok'] else 409, result)
+
+
+class DraftServer(ThreadingMixIn, HTTPServer):
+    """
+    This class is an HTTP server that handles every connection in its own thread, so that slow clients and open event
+    streams never hold up pick events.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        """
+        :param address: (host, port) tuple to listen on
+        :param service: DraftService holding the state of the draft
+        """
+        HTTPServer.__init__(self, address, DraftRequestHandler)
+        self.service = service
+
+    def handle_error(self, request, client_address):
+        # Clients leaving (e.g. closing an event stream) is expected and not worth a traceback
+        if isinstance(sys.exc_info()[1], socket.error):
+            return
+        HTTPServer.handle_error(self, request, client_address)
+
+    def server_close(self):
+        self.service.close()
+        HTTPServer.server_close(self)
+
+
+def serve(available_players, host='127.0.0.1', port=8765):
+    """
+    This method runs the draft server until it is interrupted.
+
+    :param available_players: pandas dataframe with all available players (including points earned in MC simulation)
+    :param host: string, address to listen on
+    :param port: int, port to listen on
+    """
+
+    server = DraftServer((host, port), DraftService(available_players))
+    print('Draft server listening on http://'+host+':'+str(server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,328 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+import profiling
+from lineup_optimizer import DEFAULT_LEAGUE, _is_legal
+from player_pool import load_players
+from batch_leagues import load_leagues
+
+
+# Ways a team can pick: 'greedy' takes the best available player by points that can legally be added (the first pick
+# of build_optimal_team), 'adp' takes the player with the best average draft position, 'need' does the same but fills
+# the position minimums first, and 'stack' is greedy but pairs its QB with a WR of the same NFL team (and the other way
+# around) when one is available for at most STACK_MARGIN points less
+PICKERS = ['greedy', 'adp', 'need', 'stack']
+
+# Default strategies to compare, and the bots the other teams are drawn from
+STRATEGIES = ['greedy', 'stack']
+BOTS = ['adp', 'greedy', 'need']
+
+# Number of teams in a league, spread (in draft spots) of how far the picks of ADP bots stray from the average draft
+# position, and points given up for a stacked QB/WR pair
+DRAFT_TEAMS = 12
+ADP_NOISE = 6.0
+STACK_MARGIN = 2.0
+
+
+class DraftSimulator(object):
+    """
+    This class runs full snake drafts without any input, with every team picked for by a bot. The players are held in
+    plain lists of each position group (presorted by points, and by average draft position in each draft), with a
+    cursor to the best one that is still available, so a pick only has to look at the top player of each group and
+    the cursors only move when that player is drafted. Whether a position group can still be added to a roster only
+    depends on the counts of the roster, so it is worked out once for each roster state with the same rules as
+    RosterState (see legal_groups).
+    """
+
+    def __init__(self, pool, league=None, teams=DRAFT_TEAMS, bots=BOTS, adp_noise=ADP_NOISE):
+        """
+        :param pool: pandas dataframe with all available players (including points earned in MC simulation, and
+                     optionally their average draft position in an 'adp' column)
+        :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+        :param teams: int, number of teams in the league
+        :param bots: list of PICKERS the other teams are drawn from
+        :param adp_noise: float, spread of the picks of ADP bots (in draft spots)
+        """
+
+        self.league = league or DEFAULT_LEAGUE
+        self.teams = teams
+        self.bots = list(bots)
+        self.adp_noise = adp_noise
+        self.rounds = self.league.roster_size
+
+        # Players that can't be used in the league, or never played, are never drafted
+        groups = np.array([self.league.group_index.get(position, -1) for position in pool['position']], dtype=np.int64)
+        points = pool['points'].values.astype(np.float64)
+        keep = (groups >= 0) & np.isfinite(points)
+        self.player_ids = pool.index[keep]
+        self.groups = groups[keep].tolist()
+        self.nfl_teams = [str(team) for team in pool['team'].values[keep]]
+        points = points[keep]
+
+        # Without an average draft position, players are expected to go in order of their points
+        if 'adp' in pool.columns:
+            adp = pool['adp'].values[keep].astype(np.float64)
+        else:
+            adp = np.empty(len(points))
+            adp[np.argsort(-points, kind='mergesort')] = np.arange(1, len(points) + 1)
+
+        # Players of each group from most to fewest points. Every list ends with a sentinel (the index after the last
+        # player) that has the worst points and draft position, so the lists never run out.
+        sentinel = len(points)
+        order = np.argsort(-points, kind='mergesort')
+        self.by_points = [order[groups[keep][order] == g].tolist() + [sentinel]
+                          for g in range(len(self.league.groups))]
+        self.points = points.tolist() + [-np.inf]
+        self.adp = np.append(adp, np.inf)
+        self._group_array = np.append(groups[keep], -1)
+        self._legal = {}
+        self.qb = self.league.group_index.get('QB')
+        self.wr = self.league.group_index.get('WR')
+
+    def legal_groups(self, counts, remaining):
+        """
+        This method lists the position groups that a player can be added from, for a roster with these counts.
+
+        :param counts: list of ints, number of players in each position group of the league
+        :param remaining: int, number of open spots left on the roster
+        :return: list of the indices of the groups that can be added
+        """
+
+        key = tuple(counts) + (remaining,)
+        legal = self._legal.get(key)
+        if legal is None:
+            legal = []
+            if remaining > 0:
+                for g in range(len(counts)):
+                    counts[g] += 1
+                    if _is_legal(counts, remaining - 1, self.league):
+                        legal.append(g)
+                    counts[g] -= 1
+            self._legal[key] = legal
+        return legal
+
+    def draft(self, rng, strategy):
+        """
+        This method runs one snake draft. The user sits in a random draft slot and picks with the strategy, and every
+        other team is given a random bot.
+
+        :param rng: numpy RandomState for the draft (the same state gives the same draft slot, bots and ADP noise)
+        :param strategy: string, one of PICKERS
+        :return: int draft slot of the user, list of the total points of the roster of each team, and list of the
+                 players (indices into player_ids) on the users roster
+        """
+
+        n_groups = len(self.league.groups)
+        group_min = self.league.group_min
+        sentinel = len(self.groups)
+        slot = rng.randint(self.teams)
+        bots = [self.bots[i] for i in rng.randint(len(self.bots), size=self.teams)]
+        bots[slot] = strategy
+
+        # The ADP bots see the players in the order of their average draft position, moved by some noise (drawn last,
+        # so skipping it when there are no ADP bots doesn't change the rest of the draft)
+        if 'adp' in bots or 'need' in bots:
+            adp = self.adp + self.adp_noise * rng.standard_normal(len(self.adp))
+            order = np.argsort(adp, kind='mergesort')
+            by_adp = [order[self._group_array[order] == g].tolist() + [sentinel] for g in range(n_groups)]
+            adp = adp.tolist()
+        else:
+            adp, by_adp = None, self.by_points
+
+        # Best available player of each group in both orders, and where it is in the list of the group. The sentinel
+        # closes every list and is never picked.
+        available = [True] * (sentinel + 1)
+        orders = [(self.by_points, [0] * n_groups, [players[0] for players in self.by_points]),
+                  (by_adp, [0] * n_groups, [players[0] for players in by_adp])]
+        points_heads, adp_heads = orders[0][2], orders[1][2]
+
+        counts = [[0] * n_groups for t in range(self.teams)]
+        remaining = [self.rounds] * self.teams
+        rosters = [[] for t in range(self.teams)]
+        points = self.points
+
+        for r in range(self.rounds):
+            for t in (range(self.teams) if r % 2 == 0 else range(self.teams - 1, -1, -1)):
+                legal = self.legal_groups(counts[t], remaining[t])
+                bot = bots[t]
+                pick = sentinel
+                if bot == 'adp' or bot == 'need':
+                    if bot == 'need':
+                        legal = [g for g in legal if counts[t][g] < group_min[g]] or legal
+                    for g in legal:
+                        if adp[adp_heads[g]] < adp[pick]:
+                            pick = adp_heads[g]
+                else:
+                    for g in legal:
+                        if points[points_heads[g]] > points[pick]:
+                            pick = points_heads[g]
+                    if bot == 'stack' and pick != sentinel:
+                        pick = self._stack(pick, rosters[t], legal, available)
+                if pick == sentinel:
+                    continue
+
+                # Move the heads past the drafted player
+                g = self.groups[pick]
+                available[pick] = False
+                for lists, cursors, heads in orders:
+                    if heads[g] == pick:
+                        players = lists[g]
+                        c = cursors[g] + 1
+                        while not available[players[c]]:
+                            c += 1
+                        cursors[g] = c
+                        heads[g] = players[c]
+
+                rosters[t].append(pick)
+                counts[t][g] += 1
+                remaining[t] -= 1
+
+        scores = [sum(points[i] for i in roster) for roster in rosters]
+        return slot, scores, rosters[slot]
+
+    def _stack(self, pick, roster, legal, available):
+        """
+        This method swaps the greedy pick for a stacked one: a WR of the NFL team of a QB on the roster that has no
+        WR of that team yet (or a QB for a WR), if one is available for at most STACK_MARGIN points less.
+
+        :return: the player to pick
+        """
+
+        qb_teams = set(self.nfl_teams[i] for i in roster if self.groups[i] == self.qb)
+        wr_teams = set(self.nfl_teams[i] for i in roster if self.groups[i] == self.wr)
+        for group, teams in [(self.wr, qb_teams - wr_teams), (self.qb, wr_teams - qb_teams)]:
+            if group is None or group not in legal or not teams:
+                continue
+            for i in self.by_points[group]:
+                if self.points[i] < self.points[pick] - STACK_MARGIN:
+                    break
+                if available[i] and self.nfl_teams[i] in teams:
+                    return i
+        return pick
+
+
+def _simulate_chunk(pool, league, teams, bots, adp_noise, strategies, seed, drafts):
+    """
+    This method runs a chunk of drafts with every strategy in a worker process.
+
+    :param drafts: list of ints, numbers of the drafts to run (each draft has its own random stream)
+    :return: list of (draft, strategy, slot, points, rank) tuples
+    """
+
+    simulator = DraftSimulator(pool, league, teams, bots, adp_noise)
+    results = []
+    for d in drafts:
+        for strategy in strategies:
+            # Every strategy sees the same draft slot, bots and ADP noise
+            slot, scores, roster = simulator.draft(np.random.RandomState([seed, d]), strategy)
+            rank = 1 + sum(1 for score in scores if score > scores[slot])
+            results.append((d, strategy, slot, scores[slot], rank))
+    return results
+
+
+def simulate_drafts(pool, drafts, strategies=STRATEGIES, league=None, teams=DRAFT_TEAMS, bots=BOTS,
+                    adp_noise=ADP_NOISE, seed=None, workers=1):
+    """
+    This method runs many snake drafts for each strategy, sharded across a process pool if workers > 1. Since each
+    draft has its own random stream, the results are the same no matter how many workers are used.
+
+    :param pool: pandas dataframe with all available players (including points earned in MC simulation)
+    :param drafts: int, number of drafts to run for each strategy
+    :param strategies: list of PICKERS for the user to draft with
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :param teams: int, number of teams in the league
+    :param bots: list of PICKERS the other teams are drawn from
+    :param adp_noise: float, spread of the picks of ADP bots (in draft spots)
+    :param seed: int, seed for the random number generators (optional)
+    :param workers: int, number of processes to run the drafts in
+    :return: pandas dataframe with the draft slot, total points and finish (1 is the most points) of the users roster
+             in each draft and strategy
+    """
+
+    for picker in list(strategies) + list(bots):
+        if picker not in PICKERS:
+            raise ValueError('Unknown draft strategy: '+str(picker))
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+
+    # Only the columns the bots look at are sent to the workers
+    pool = pool[[column for column in ['position', 'team', 'points', 'adp'] if column in pool.columns]]
+
+    results = []
+    if workers > 1:
+        chunks = [list(chunk) for chunk in np.array_split(np.arange(drafts), workers * 4) if len(chunk)]
+        progress = profiling.Progress(drafts * len(strategies), 'Simulated draft', 'drafts')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = dict((executor.submit(_simulate_chunk, pool, league, teams, bots, adp_noise, strategies, seed,
+                                            chunk), len(chunk) * len(strategies))
+                           for chunk in chunks)
+            for future in as_completed(futures):
+                results.extend(future.result())
+                progress.update(futures[future])
+        progress.finish()
+    else:
+        results = _simulate_chunk(pool, league, teams, bots, adp_noise, strategies, seed, range(drafts))
+
+    results = pd.DataFrame.from_records(results, columns=['draft', 'strategy', 'slot', 'points', 'rank'])
+    return results.sort_values(by=['draft', 'strategy']).reset_index(drop=True)
+
+
+def summarize_drafts(results):
+    """
+    :param results: pandas dataframe of drafts (see simulate_drafts)
+    :return: pandas dataframe with the distribution of the total points of the users roster, the mean finish and the
+             share of drafts won for each strategy
+    """
+
+    grouped = results.groupby('strategy')
+    summary = pd.DataFrame({'mean': grouped['points'].mean(),
+                            'std': grouped['points'].std(),
+                            'q05': grouped['points'].quantile(0.05),
+                            'q50': grouped['points'].quantile(0.5),
+                            'q95': grouped['points'].quantile(0.95),
+                            'mean finish': grouped['rank'].mean(),
+                            'won': grouped['rank'].apply(lambda rank: (rank == 1).mean())},
+                           columns=['mean', 'std', 'q05', 'q50', 'q95', 'mean finish', 'won'])
+    return summary.sort_values(by='mean', ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare draft strategies over many simulated snake drafts.')
+    parser.add_argument('--file', required=True, help='file with all players (e.g. 100_sim_all_players.npy)')
+    parser.add_argument('--drafts', type=int, default=1000, help='number of drafts to run for each strategy')
+    parser.add_argument('--strategies', nargs='+', choices=PICKERS, default=STRATEGIES,
+                        help='strategies for the user to draft with')
+    parser.add_argument('--bots', nargs='+', choices=PICKERS, default=BOTS,
+                        help='bots the other teams are drawn from')
+    parser.add_argument('--teams', type=int, default=DRAFT_TEAMS, help='number of teams in the league')
+    parser.add_argument('--adp-noise', type=float, default=ADP_NOISE,
+                        help='spread of the picks of ADP bots around their average draft position (in draft spots)')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes to run the drafts in')
+    parser.add_argument('--seed', type=int, default=None, help='seed for reproducible drafts')
+    parser.add_argument('--leagues', default=None,
+                        help='JSON file with league configs to draft in (see batch_leagues.py), the default rules if '
+                             'not given')
+    parser.add_argument('--output', default=None, help='CSV file to write the result of every draft to')
+    args = parser.parse_args()
+    try:
+        leagues = load_leagues(args.leagues) if args.leagues else [DEFAULT_LEAGUE]
+    except ValueError as e:
+        parser.error(str(e))
+    pool = load_players(args.file)
+
+    all_results = []
+    for league in leagues:
+        start = time.time()
+        results = simulate_drafts(pool, args.drafts, args.strategies, league, args.teams, args.bots, args.adp_noise,
+                                  args.seed, args.workers)
+        seconds = time.time() - start
+        print('League '+str(league.name)+': ran '+str(len(results.index))+' drafts in '+str(round(seconds, 2))+
+              ' seconds ('+str(int(len(results.index) / seconds))+' drafts per second)')
+        print(tabulate(summarize_drafts(results), headers='keys', tablefmt='psql', floatfmt='.2f'))
+        results.insert(0, 'league', league.name)
+        all_results.append(results)
+    if args.output:
+        pd.concat(all_results, ignore_index=True).to_csv(args.output, index=False)
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import nflgame
+import numpy as np
+import profiling
+from scoring import STAT_COLUMNS, stat_vector
+
+
+def iter_game_rows(game):
+    """
+    This method streams the stats of every player in one game.
+
+    :param game: nflgame Game
+    :return: generator of (player_id, numpy array of stats aligned with STAT_COLUMNS)
+    """
+
+    profiling.count('games parsed')
+    for person in game.players:
+        if person.player is None:
+            continue
+        yield person.playerid, stat_vector(person)
+
+
+def iter_week_rows(year, week):
+    """
+    This method streams the stats of every player in every game of one week. Games are loaded one at a time, so only
+    a single game is ever held in memory.
+
+    :param year: int, season
+    :param week: int, week of the season
+    :return: generator of (player_id, numpy array of stats aligned with STAT_COLUMNS)
+    """
+
+    games = nflgame.games_gen(year, week=week)
+    if games is None:
+        return
+    for game in games:
+        for row in iter_game_rows(game):
+            yield row
+
+
+def scheduled_games(year, week):
+    """
+    :param year: int, season
+    :param week: int, week of the regular season
+    :return: set of the eids of every game on the schedule of the week
+    """
+    return set(eid for eid, info in nflgame.sched.games.items()
+               if info['year'] == year and info['week'] == week and info['season_type'] == 'REG')
+
+
+def iter_rows(years, weeks):
+    """
+    This method streams the stats of every player in every game of several seasons, season by season and week by week.
+
+    :param years: list of ints, seasons to stream
+    :param weeks: list of ints, weeks of each season to stream
+    :return: generator of (year, week, player_id, numpy array of stats aligned with STAT_COLUMNS)
+    """
+
+    for year in years:
+        for week in weeks:
+            for player_id, stats in iter_week_rows(year, week):
+                yield year, week, player_id, stats
+
+
+class ScoreStore(object):
+    """
+    This class is an on-disk store of the weekly stats of every player. Each week is written as a series of chunk files
+    holding at most chunk_size rows, so memory stays bounded no matter how many seasons are ingested. A manifest records
+    which weeks are complete, so ingesting again only parses weeks that were not stored yet. Weeks that were ingested
+    before all of their games were over are recorded as partial, along with the games that were stored, so ingesting
+    again only parses the games of the week that finished since.
+    """
+
+    def __init__(self, directory, chunk_size=4096):
+        """
+        :param directory: string, folder the chunks are stored in (created if it does not exist)
+        :param chunk_size: int, maximum number of rows held in memory before they are written out
+        """
+
+        self.directory = directory
+        self.chunk_size = chunk_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._manifest_path = os.path.join(directory, 'manifest.json')
+        self.manifest = {'stat_columns': STAT_COLUMNS, 'weeks': {}, 'partial': {}}
+        if os.path.isfile(self._manifest_path):
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('stat_columns') == STAT_COLUMNS:
+                manifest.setdefault('partial', {})
+                self.manifest = manifest
+
+    @staticmethod
+    def _week_key(year, week):
+        return '%d_%02d' % (year, week)
+
+    def has_week(self, year, week):
+        """
+        :param year: int, season
+        :param week: int, week of the season
+        :return: boolean, whether the week is completely stored
+        """
+        key = self._week_key(year, week)
+        return key in self.manifest['weeks'] and key not in self.manifest['partial']
+
+    def is_partial(self, year, week):
+        """
+        :param year: int, season
+        :param week: int, week of the season
+        :return: boolean, whether some (but not all) of the games of the week are stored
+        """
+        return self._week_key(year, week) in self.manifest['partial']
+
+    def modified(self):
+        """
+        :return: float, time the manifest was last written (0 if nothing was stored yet)
+        """
+        return os.path.getmtime(self._manifest_path) if os.path.isfile(self._manifest_path) else 0.0
+
+    def _write_chunk(self, year, week, number, player_ids, rows):
+        name = 'stats_%s_%d.npz' % (self._week_key(year, week), number)
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            np.savez_compressed(f, player_ids=np.array(player_ids), stats=np.array(rows, dtype=np.float32))
+        return name
+
+    def _save_manifest(self):
+        temporary = self._manifest_path+'.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.manifest, f)
+        if os.path.isfile(self._manifest_path):
+            os.remove(self._manifest_path)
+        os.rename(temporary, self._manifest_path)
+
+    def ingest_week(self, year, week):
+        """
+        This method streams the finished games of one week that are not stored yet into chunk files. The week is marked
+        as complete once every game on its schedule is stored, and as partial until then. Games that are still being
+        played are left out, and weeks without any finished games (e.g. weeks that have not been played yet) are not
+        marked, so they are tried again next time.
+
+        :param year: int, season
+        :param week: int, week of the season
+        :return: int, number of rows stored
+        """
+
+        key = self._week_key(year, week)
+        chunks = list(self.manifest['weeks'].get(key, []))
+        stored_games = set(self.manifest['partial'].get(key, []))
+        new_games = []
+        player_ids = []
+        rows = []
+        stored = 0
+        for game in nflgame.games_gen(year, week=week) or []:
+            if game.eid in stored_games or not game.game_over():
+                continue
+            for player_id, stats in iter_game_rows(game):
+                player_ids.append(player_id)
+                rows.append(stats)
+                if len(rows) >= self.chunk_size:
+                    chunks.append(self._write_chunk(year, week, len(chunks), player_ids, rows))
+                    stored += len(rows)
+                    player_ids, rows = [], []
+            new_games.append(game.eid)
+        if rows:
+            chunks.append(self._write_chunk(year, week, len(chunks), player_ids, rows))
+            stored += len(rows)
+
+        if new_games:
+            stored_games.update(new_games)
+            self.manifest['weeks'][key] = chunks
+            if stored_games >= scheduled_games(year, week):
+                self.manifest['partial'].pop(key, None)
+            else:
+                self.manifest['partial'][key] = sorted(stored_games)
+            self._save_manifest()
+        return stored
+
+    def ingest(self, years, weeks):
+        """
+        This method stores every week of the seasons that is not stored yet.
+
+        :param years: list of ints, seasons to ingest
+        :param weeks: list of ints, weeks of each season to ingest
+        :return: int, number of weeks that were parsed
+        """
+
+        parsed = 0
+        for year in years:
+            for week in weeks:
+                if not self.has_week(year, week):
+                    print('Ingesting '+str(year)+' week '+str(week))
+                    with profiling.timer('ingest week'):
+                        self.ingest_week(year, week)
+                    parsed += 1
+        return parsed
+
+    def _chunks(self, year, week):
+        for name in self.manifest['weeks'].get(self._week_key(year, week), []):
+            with np.load(os.path.join(self.directory, name)) as data:
+                yield data['player_ids'].astype(str), data['stats']
+
+    def load(self, years, weeks):
+        """
+        This method lays the stored stats out as a players x weeks x stats array. The chunks are read twice (first for
+        the player ids, then for the stats) so that only one chunk is held in memory besides the array itself.
+
+        :param years: list of ints, seasons to load
+        :param weeks: list of ints, weeks of each season to load
+        :return: list of player_ids, list of (year, week) columns, and the stats array (NaN where a player did not play)
+        """
+
+        columns = [(year, week) for year in years for week in weeks]
+
+        player_ids = set()
+        for year, week in columns:
+            for ids, stats in self._chunks(year, week):
+                player_ids.update(ids)
+        player_ids = sorted(player_ids)
+        rows = dict((player_id, i) for i, player_id in enumerate(player_ids))
+
+        array = np.full((len(player_ids), len(columns), len(STAT_COLUMNS)), np.nan, dtype=np.float32)
+        for column, (year, week) in enumerate(columns):
+            for ids, stats in self._chunks(year, week):
+                indices = np.array([rows[player_id] for player_id in ids], dtype=np.int64)
+
+                # A player only plays one game a week, but add up repeated rows to be safe
+                week_stats = array[:, column]
+                unseen = np.isnan(week_stats[indices, 0])
+                week_stats[indices[unseen]] = 0.0
+                np.add.at(week_stats, indices, stats)
+        return player_ids, columns, array
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stream nflgame seasons into the weekly stats store.')
+    parser.add_argument('--store', default='score_store', help='folder of the weekly stats store')
+    parser.add_argument('--years', type=int, nargs=2, default=[2014, 2017], metavar=('FIRST', 'LAST'))
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    store = ScoreStore(args.store, args.chunk_size)
+    parsed = store.ingest(range(args.years[0], args.years[1] + 1), range(1, 18))
+    print('Parsed '+str(parsed)+' new weeks.')
@@ -1,7 +1,145 @@
+import argparse
+import itertools
+import os.path
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import nflgame
 import numpy as np
 import pandas as pd
 from tabulate import tabulate
+import score_table
+import scoring
+import profiling
+import team_simulation
+from sampling import SeasonWeights, ExponentialDecay, draw_columns
+from player_index import PlayerIndex
+from sim_cache import SimulationCache, merge_moments
+from player_pool import save_player_pool, POOL_EXTENSION
+
+
+# Seasons sampled by the MC simulation, weighted heuristically since more recent years are a better reflection of
+# player ability
+YEARS = [2014, 2015, 2016, 2017]
+YEAR_WEIGHTS = [0.1, .15, .25, .5]
+WEEKS = range(1, 18)
+
+# File the precomputed weekly fantasy points are stored in, and the folder of the weekly stats they are built from
+SCORE_TABLE_FILE = 'weekly_scores.npz'
+SCORE_STORE_DIR = 'score_store'
+
+# Model used to weight the weeks that are sampled from the score table (see set_weighting_model)
+_weighting = SeasonWeights(dict(zip(YEARS, YEAR_WEIGHTS)))
+
+# Number of players on a full roster, and the [min,max] number of players that can be in each position group
+ROSTER_SIZE = 16
+TEAM_RESTRICTIONS = {'QB': [1, 4],
+                     'RB': [2, 8],
+                     'WR': [2, 8],
+                     'TE': [1, 3],
+                     'K': [1, 3],
+                     'D/ST': [1, 3]}
+
+# Positions that can fill the flex spots, and the number of flex spots
+FLEX_POSITIONS = ['TE', 'RB', 'WR']
+FLEX_SPOTS = 1
+
+# Group used to regulate the number of each player type on a fantasy team, for each football position
+FF_POSITIONS = {'QB': 'QB', 'RB': 'RB', 'WR': 'WR', 'TE': 'TE', 'K': 'K'}
+FF_POSITIONS.update((pos, 'D/ST') for pos in ['DB', 'DE', 'DT', 'CB', 'LS', 'LB', 'P', 'ILB', 'OLB', 'T', 'NT'])
+
+# Confidence level (as a z-score) of the intervals simulate_adaptive stops on, and the number of draws it runs for every
+# player in each round
+ADAPTIVE_Z = 1.96
+ADAPTIVE_BATCH = 50
+
+# Score table loaded by load_score_table (shared by every simulation in the process)
+_score_table = None
+
+# Score tables sent to this worker process by simulate_players, by version and scoring weights
+_shard_tables = {}
+
+# Rules used to convert stats into fantasy football points (see set_scoring_profile)
+_scoring_profile = scoring.DEFAULT_PROFILE
+_scoring_weights = scoring.compile_profile(_scoring_profile)
+
+# Name index of the player database built by get_player_index
+_player_index = None
+
+
+def prune_candidates(players, table, N, roster_positions=(), use_bounds=False, league=None):
+    """
+    This method drops the players that could never be picked for the roster before they are simulated: players at
+    positions that don't count in fantasy football, and players that did not play in any of the sampled weeks (they
+    would only ever be simulated as -inf). Optionally, players are also dropped if even their best week scores less than
+    the worst week of enough players in their position group to fill every spot the group can hold.
+
+    :param players: list of Player objects that could be simulated
+    :param table: ScoreTable with precomputed weekly points
+    :param N: int number of times the MC simulation would be run on each player
+    :param roster_positions: positions of the players already on the roster
+    :param use_bounds: boolean, whether to also drop players whose best week can't crack the roster
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :return: list of the remaining Players, and a dict counting the players dropped for each reason and the
+             simulations saved
+    """
+
+    league = league or DEFAULT_LEAGUE
+    report = {'ineligible_position': 0, 'no_games': 0, 'below_cutoff': 0}
+
+    # Only the weeks that can be drawn in the simulation count
+    columns = [table.column(year, week) for year in YEARS for week in WEEKS]
+    columns = [column for column in columns if column is not None]
+
+    kept = []
+    bounds = {}
+    for p in players:
+        if league.group_index.get(p.position) is None:
+            report['ineligible_position'] += 1
+            continue
+        row = table.row(p.player_id)
+        weeks = table.points[row, columns] if row is not None else np.array([])
+        weeks = weeks[~np.isnan(weeks)]
+        if len(weeks) == 0:
+            report['no_games'] += 1
+            continue
+        kept.append(p)
+        bounds[p.player_id] = (weeks.min(), weeks.max())
+
+    if use_bounds:
+        state = RosterState(roster_positions, league)
+        cutoffs = {}
+        for group in range(len(league.groups)):
+
+            # Number of players of this group the roster can still take (more if it can fill the flex spots)
+            spots = league.group_max[group] - state.counts[group]
+            spots += league.flex_spots if group in league.flex_group_indices else 0
+            worst = sorted((bounds[p.player_id][0] for p in kept if league.group_index[p.position] == group),
+                           reverse=True)
+            cutoffs[group] = worst[spots - 1] if 0 < spots <= len(worst) else -np.inf
+
+        # A player whose best week is below the worst week of that many players will never be picked
+        remaining = [p for p in kept if bounds[p.player_id][1] >= cutoffs[league.group_index[p.position]]]
+        report['below_cutoff'] = len(kept) - len(remaining)
+        kept = remaining
+
+    report['simulations_saved'] = (len(players) - len(kept)) * N
+    return kept, report
+
+
+def get_player_index():
+    """
+    This method returns the name index of every player in nflgame.players. The index is built the first time it is
+    needed and reused for every lookup after that.
+
+    :return: PlayerIndex
+    """
+
+    global _player_index
+    if _player_index is None:
+        _player_index = PlayerIndex(nflgame.players.values())
+    return _player_index
 
 
 def validate_player(player):
@@ -15,14 +153,18 @@ def validate_player(player):
     """
 
     # Search for the player, record all matches
-    matches = nflgame.find(player)
+    index = get_player_index()
+    matches = index.find(player)
 
     # If we only found one result, return it
     if len(matches) == 1:
         return matches[0]
 
-    # If we didn't find anything, return nothing
+    # If we didn't find anything, suggest similar names and return nothing
     elif len(matches) == 0:
+        suggestions = index.suggest(player)
+        if suggestions:
+            print('Did you mean: '+', '.join(p.full_name+' ('+str(p.team)+')' for p in suggestions)+'?')
         return None
 
     # If we made it this far, we found more than one match
@@ -70,76 +212,117 @@ def get_active_players():
     # Return all players that are available
     return available_players
 
-def score_to_fantasy_points(player):
+
+def load_score_table(path=SCORE_TABLE_FILE):
+    """
+    This method returns the precomputed weekly points of every player. The table is read (or built, on the first run)
+    once and then reused by every simulation.
+
+    :param path: string, file the table is stored in
+    :return: ScoreTable
+    """
+
+    global _score_table
+    if _score_table is None:
+        _score_table = score_table.get_score_table(path, YEARS, WEEKS, _scoring_weights, SCORE_STORE_DIR)
+    return _score_table
+
+
+def set_weighting_model(model):
+    """
+    This method switches the model used to weight the weeks that are sampled from the score table.
+
+    :param model: weighting model (e.g. sampling.SeasonWeights or sampling.ExponentialDecay)
+    """
+
+    global _weighting
+    _weighting = model
+
+
+def set_scoring_profile(profile):
+    """
+    This method switches the rules used to convert stats into fantasy football points. If the score table is already
+    loaded, it is rescored right away (no games have to be parsed again).
+
+    :param profile: string or dict, the scoring profile (see scoring.load_profile)
+    """
+
+    global _scoring_profile, _scoring_weights
+    _scoring_profile = profile
+    _scoring_weights = scoring.compile_profile(profile)
+    if _score_table is not None:
+        _score_table.rescore(_scoring_weights)
+
+
+def score_to_fantasy_points(player, weights=None):
     """
     This method converts the plays made by a player into fantasy football points.
 
     :param player: Player object (with combined plays)
+    :param weights: numpy array of points per unit of each stat (defaults to the current scoring profile)
     :return: float, points earned by the Player
     """
 
-    point_conversion = {'passing_twoptm': lambda x: x*2.0,
-                        'passing_yds': lambda x: x/5.0*0.2,
-                        'passing_tds': lambda x: x*4.0,
-                        'passing_ints': lambda x: x*(-2.0),
-                        'rushing_yds': lambda x: x*0.1,
-                        'rushing_tds': lambda x: x*6.0,
-                        'rushing_twoptm': lambda x: x*2.0,
-                        'receiving_yds': lambda x: x*0.1,
-                        'receiving_rec': lambda x: x*0.5,
-                        'receiving_tds': lambda x: x*6.0,
-                        'receiving_twoptm': lambda x: x*2.0,
-                        'kickret_tds': lambda x: x*6.0,
-                        'puntret_tds': lambda x: x*6.0,
-                        'fumbles_lost': lambda x: x*(-2.0),
-                        'kicking_fgb': lambda x: x*(-1.0),
-                        'fumbles_rec_tds': lambda x: x*6.0,
-                        'defense_int_tds': lambda x: x*6.0,
-                        'fumble_rec_tds': lambda x: x*6.0,
-                        'defense_safe': lambda x: x*2.0,
-                        'defense_fgblk': lambda x: x*2.0,
-                        'defense_puntblk': lambda x: x*2.0,
-                        'defense_int': lambda x: x*2.0,
-                        'fumbles_rec': lambda x: x*2.0,
-                        'kicking_fgmissed': lambda x: x*(-1.0),
-                        'defense_sk': lambda x: x*1.0}
-
-    # Initialize points to zero
-    points = 0.0
-
-    # Go through each stat (or play) in the player
-    for stat in player._stats:
-
-        # If the play can be mapped to fantasy football points...
-        if stat in point_conversion.keys():
-
-            # Add the number of points earned to the total points
-            points += point_conversion[stat](getattr(player, stat))
-
-    return points
-
-
-def get_player_score(player):
+    if weights is None:
+        weights = _scoring_weights
+    return float(np.dot(scoring.stat_vector(player), weights))
+
+
+def player_rng(seed, player_id, offset=0):
+    """
+    This method creates the random number generator used to simulate one player. The stream only depends on the seed
+    and the player_id, so a player gets the same draws no matter which process (or in which order) it is simulated.
+    Simulations added on top of offset earlier ones (see simulate_cached) get a stream of their own.
+
+    :param seed: int, seed of the whole simulation
+    :param player_id: string, id of the player
+    :param offset: int, number of simulations of the player that were already run
+    :return: numpy RandomState
+    """
+    return np.random.RandomState([seed, zlib.crc32(player_id.encode('utf-8')) & 0xffffffff] + ([offset] if offset else []))
+
+
+def get_player_score(player, table=None, rng=None):
     """
     This method takes in a Player object. A random week/year is selected, and the players fantasy football points for
     that week/year are queried and returned.
 
     :param player: Player to calculate points for
+    :param table: ScoreTable with precomputed weekly points, sampled with the current weighting model (if None, the
+                  week is parsed with nflgame)
+    :param rng: numpy RandomState to draw the week/year from (defaults to the global numpy generator)
     :return: float, number of points earned by Player
     """
 
+    if rng is None:
+        rng = np.random
+
+    # If the weekly points have been precomputed, draw one of the weeks the player played from their alias table
+    if table is not None:
+        row = table.row(player.player_id)
+        prob, alias, playable = table.sampling_tables(_weighting)
+        if row is None or not playable[row]:
+            profiling.count('misses (-inf)')
+            return -float('Inf')
+        profiling.count('table draws')
+        return float(table.points[row, draw_columns(prob, alias, row, 1, rng)[0]])
+
     # Only loop through a finite number of times to find games that a user has played in.
     i = 0
     while i < 8:
         i += 1
+        if i > 1:
+            profiling.count('retries')
 
         # Get random week/year to query
-        year = np.random.choice([2014, 2015, 2016, 2017], p=[0.1, .15, .25, .5])
-        week = np.random.randint(1, 18)
+        year = rng.choice(YEARS, p=YEAR_WEIGHTS)
+        week = rng.randint(1, 18)
 
         # Combine all plays from all games during this time period
-        games = nflgame.games(year, week=week)
-        games = nflgame.combine_game_stats(games)
+        with profiling.timer('game loads'):
+            games = nflgame.games(year, week=week)
+        with profiling.timer('combine_game_stats'):
+            games = nflgame.combine_game_stats(games)
 
         # Go through each person involved in the plays
         for person in games:
@@ -150,14 +333,220 @@ def get_player_score(player):
 
             # If the player is the desired player, convert plays to fantasy points
             if player == person.player:
-                return score_to_fantasy_points(person)
+                with profiling.timer('scoring'):
+                    return score_to_fantasy_points(person)
 
     # If we can't find any games that this player has played in, they probably aren't a good pick for the team (since
     # they don't play frequently), so return -inf so that they aren't selected in the optimization.
+    profiling.count('misses (-inf)')
     return -float('Inf')
 
 
-def simulate(team, N=100):
+def simulate_matrix(player_ids, N, seed=None, table=None, offset=0):
+    """
+    This function runs the MC simulation for many players at once. For every player, the N weeks are drawn in one
+    batch from the players alias table (see sampling.build_sampling_tables), which only holds the weeks they played,
+    weighted with the current weighting model. Each draw takes constant time and never misses, and each player draws
+    from its own random stream (see player_rng).
+
+    :param player_ids: list of player_id strings to simulate
+    :param N: number of simulations to run for each player
+    :param seed: int, seed for the random number generators (optional)
+    :param table: ScoreTable with precomputed weekly points (loaded from SCORE_TABLE_FILE if None)
+    :param offset: int, number of simulations of these players that were already run
+    :return: numpy arrays with the mean and variance of the simulated points of each player
+    """
+
+    if table is None:
+        table = load_score_table()
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+    prob, alias, playable = table.sampling_tables(_weighting)
+
+    # Players that never played in the sampled weeks can't be simulated, so they are given -inf
+    means = np.full(len(player_ids), -np.inf)
+    variances = np.full(len(player_ids), np.nan)
+    if N == 0:
+        return means, variances
+
+    for i, player_id in enumerate(player_ids):
+        row = table.row(player_id)
+        if row is None or not playable[row]:
+            profiling.count('misses (-inf)')
+            continue
+        samples = table.points[row, draw_columns(prob, alias, row, N, player_rng(seed, player_id, offset))]
+        samples = samples.astype(np.float64)
+        means[i] = samples.mean()
+        variances[i] = samples.var()
+        profiling.count('table draws', N)
+    return means, variances
+
+
+def greedy_picks(positions, points, roster_positions=(), league=None):
+    """
+    This method is the greedy fill of build_optimal_team, on plain arrays so that it can be run many times (e.g. once
+    per round of simulate_adaptive, or once per candidate roster). The players are taken in descending order of points
+    (ties in the order they are given), and each one that can legally be added is, until the roster is full.
+
+    :param positions: list of the position of each player
+    :param points: numpy array of the points of each player
+    :param roster_positions: positions of the players already on the roster
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :return: numpy boolean array of the players that are picked
+    """
+
+    state = RosterState(roster_positions, league)
+    picked = np.zeros(len(points), dtype=bool)
+    blocked = set()
+    iterations = 0
+    for i in np.argsort(-points, kind='mergesort').tolist():
+
+        # If the team is full, stop looking
+        if state.remaining <= 0:
+            break
+        iterations += 1
+
+        # A position that can't be added stays that way until another player is added
+        if positions[i] in blocked:
+            continue
+        if state.can_add(positions[i]):
+            picked[i] = True
+            state.add(positions[i])
+            blocked.clear()
+        else:
+            blocked.add(positions[i])
+    profiling.count('optimizer iterations', iterations)
+    return picked
+
+
+def roster_cutoffs(positions, means, roster_positions=(), league=None):
+    """
+    This method finds the points that separate the players the greedy optimizer would put on the roster from those it
+    would leave off, for each position group. It is used to tell which players' simulations could still change the
+    roster.
+
+    :param positions: list of the position of each player
+    :param means: numpy array of the (current) simulated points of each player
+    :param roster_positions: positions of the players already on the roster
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :return: numpy array with the cutoff of the group of each player (-inf if the whole group makes the roster, inf if
+             none of it does)
+    """
+
+    league = league or DEFAULT_LEAGUE
+    picked = greedy_picks(positions, means, roster_positions, league)
+
+    # The cutoff lies halfway between the worst player picked and the best player left off
+    groups = np.array([league.group_index.get(position, -1) for position in positions], dtype=np.int64)
+    cutoffs = np.full(len(league.groups) + 1, np.inf)
+    for group in range(len(league.groups)):
+        in_group = (groups == group) & np.isfinite(means)
+        lowest_in = means[in_group & picked]
+        highest_out = means[in_group & ~picked]
+        if len(lowest_in) and len(highest_out):
+            cutoffs[group] = (lowest_in.min() + highest_out.max()) / 2.0
+        elif len(lowest_in):
+            cutoffs[group] = -np.inf
+    return cutoffs[groups]
+
+
+def simulate_adaptive(players, table, seed=None, tolerance=0.05, max_draws=1000, min_draws=ADAPTIVE_BATCH,
+                      roster_positions=(), far_tolerance=None, leagues=None, cache=None):
+    """
+    This method runs the MC simulation in rounds of ADAPTIVE_BATCH draws, keeping a running count, mean and sum of
+    squared differences for each player (see sim_cache.merge_moments), and stops simulating a player once their mean
+    is known well enough. Players whose confidence interval still contains the roster cutoff of their group (see
+    roster_cutoffs) keep drawing until the interval is within tolerance points, since that is where the ranking
+    decides the roster. Players that are clear of the cutoff (by more than tolerance) only need to get within
+    far_tolerance points. When several leagues share the simulation, a player is only clear if they are clear of the
+    cutoff of every league. Each player draws from its own random stream (see player_rng), so their draws don't depend
+    on the other players in the pool. With a cache, players start from their stored results and the new ones are
+    stored again.
+
+    :param players: list of Player objects to simulate
+    :param table: ScoreTable with precomputed weekly points
+    :param seed: int, seed for the per-player random number generators (optional, needed with a cache)
+    :param tolerance: float, half-width (in points) of the confidence interval for players near the cutoff (the
+                      smallest difference between two players that is worth telling apart)
+    :param max_draws: int, most simulations to run for any player
+    :param min_draws: int, fewest simulations to run for any player
+    :param roster_positions: positions of the players already on the roster
+    :param far_tolerance: float, half-width for players that are clearly on or off the roster (10 * tolerance if None)
+    :param leagues: list of LeagueConfigs whose roster cutoffs to check ([DEFAULT_LEAGUE] if None)
+    :param cache: SimulationCache to start from and store results in (optional)
+    :return: numpy arrays with the mean, variance and number of simulations of each player
+    """
+
+    if seed is None:
+        if cache is not None:
+            raise ValueError('The simulation cache needs a seed')
+        seed = np.random.randint(2 ** 31)
+    if far_tolerance is None:
+        far_tolerance = 10.0 * tolerance
+    leagues = leagues or [DEFAULT_LEAGUE]
+    prob, alias, playable = table.sampling_tables(_weighting)
+    positions = [p.position for p in players]
+
+    # Players that never played in the sampled weeks can't be simulated, so they are given -inf
+    rows = np.array([-1 if table.row(p.player_id) is None else table.row(p.player_id) for p in players],
+                    dtype=np.int64)
+    simulatable = (rows >= 0) & playable[np.maximum(rows, 0)]
+    counts = np.zeros(len(players), dtype=np.int64)
+    means = np.where(simulatable, 0.0, -np.inf)
+    m2 = np.zeros(len(players))
+
+    # Start from the stored results, drawing on from a stream past the simulations that were already run
+    if cache is not None:
+        keys = [cache.key(p.player_id, seed, _scoring_weights, table.version+_weighting.key()) for p in players]
+        for i in np.flatnonzero(simulatable):
+            entry = cache.get(keys[i])
+            if entry:
+                counts[i], means[i], m2[i] = entry
+            profiling.count('cache hits' if entry else 'cache misses')
+    stored = counts.copy()
+    rngs = dict((i, player_rng(seed, players[i].player_id, int(counts[i]))) for i in np.flatnonzero(simulatable))
+
+    while True:
+        # Half-width of the confidence interval of each mean, and whether it is clear of the roster cutoff of every
+        # league. The cutoffs move as the means settle, so players that were stopped start again if one moves into
+        # their interval.
+        with np.errstate(invalid='ignore', divide='ignore'):
+            half_width = ADAPTIVE_Z * np.sqrt(m2 / counts) / np.sqrt(counts)
+            clear = np.ones(len(players), dtype=bool)
+            for league in leagues:
+                cutoffs = roster_cutoffs(positions, means, roster_positions, league)
+                clear &= np.abs(means - cutoffs) > half_width + tolerance
+            settled = (half_width <= tolerance) | (clear & (half_width <= far_tolerance))
+        active = simulatable & (counts < max_draws) & ((counts < min_draws) | ~settled)
+        if not active.any():
+            break
+
+        # Draw a batch for every remaining player (players close to max_draws draw fewer), each from their own stream
+        indices = np.flatnonzero(active)
+        size = np.minimum(ADAPTIVE_BATCH, max_draws - counts[indices])
+        for batch in np.unique(size):
+            batch_indices = indices[size == batch]
+            columns = np.array([draw_columns(prob, alias, rows[i], batch, rngs[i]) for i in batch_indices])
+            samples = table.points[rows[batch_indices][:, None], columns]
+            samples = samples.astype(np.float64)
+            profiling.count('table draws', samples.size)
+
+            batch_means = samples.mean(axis=1)
+            batch_m2 = ((samples - batch_means[:, None]) ** 2).sum(axis=1)
+            counts[batch_indices], means[batch_indices], m2[batch_indices] = merge_moments(
+                counts[batch_indices], means[batch_indices], m2[batch_indices], batch, batch_means, batch_m2)
+
+    if cache is not None:
+        for i in np.flatnonzero(counts > stored):
+            cache.put(keys[i], counts[i], means[i], m2[i])
+        cache.evict()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variances = np.where(counts > 0, m2 / counts, np.nan)
+    return means, variances, counts
+
+
+def simulate(team, N=100, table=None, seed=None):
     """
     This function runs a Monte Carlo simulation by selecting a random year (weighted heuristically since more recent
     years are a better reflection of player ability) and random week to sample a players fantasy score. The average
@@ -165,45 +554,235 @@ def simulate(team, N=100):
 
     :param team: list of Player objects
     :param N: number of simulations to run
+    :param table: ScoreTable with precomputed weekly points (optional)
+    :param seed: int, seed for the per-player random number generators (optional)
     :return: total points for team
     """
 
+    # If there are no simulations to run, there are no points to add
+    if N == 0:
+        return 0.0
+
+    # With precomputed points, all of the players are simulated in one batch
+    if table is not None:
+        means, variances = simulate_matrix([player.player_id for player in team], N, seed, table)
+        return float(means.sum())
+
     # Initialize total score for team
     total_score = 0.0
 
     # Go through each player on the team
     for player in team:
-        simulation_score = []
+        player_score = 0.0
+        rng = None if seed is None else player_rng(seed, player.player_id)
 
-        # Simulate their score N times
+        # Simulate their score N times, keeping a running total rather than every score
         for i in range(N):
-            simulation_score.append(get_player_score(player))
+            player_score += get_player_score(player, table, rng)
 
         # Add the average of the N simulations to the total team score
-        if len(simulation_score) != 0:
-            total_score += np.mean(simulation_score)
+        total_score += player_score / N
     return total_score
 
 
-def players_to_df(players, N):
+def _shard_table(path, version):
+    """
+    This method loads the score table a worker process was sent by simulate_players, once per worker.
+
+    :param path: string, file the main process saved the table to
+    :param version: string, version of the table (see ScoreTable)
+    :return: ScoreTable
+    """
+
+    key = (version, _scoring_weights.tobytes())
+    if key not in _shard_tables:
+        table = score_table.ScoreTable.load(path, _scoring_weights)
+        if table.version != version:
+            raise ValueError(path+' does not hold the score table that was sent to the worker')
+        _shard_tables[key] = table
+    return _shard_tables[key]
+
+
+def _simulate_shard(player_ids, N, seed, table_file, profile, offset, weighting, instrument=False):
+    """
+    This method simulates one shard of the player pool in a worker process. The score table is read from the file the
+    main process saved it to, and the Player objects are looked up again from nflgame. With instrument, the counters
+    and timers of the shard are sent back so they can be added to those of the main process.
+
+    :param player_ids: list of player_id strings to simulate
+    :param N: int number of times to run the MC simulation on each player
+    :param seed: int, seed for the per-player random number generators
+    :param table_file: (path, version) of the saved score table to sample from, or None to simulate from nflgame
+    :param profile: string or dict, the scoring profile to use
+    :param offset: int, number of simulations of these players that were already run
+    :param weighting: weighting model to sample weeks with
+    :param instrument: boolean, whether to record counters and timers (see profiling)
+    :return: lists of the mean and variance of the simulated points of each player, and a profiling snapshot (None
+             unless instrument)
+    """
+
+    if profile != _scoring_profile:
+        set_scoring_profile(profile)
+    set_weighting_model(weighting)
+    profiling.enable(instrument)
+    profiling.reset()
+
+    if table_file is not None:
+        means, variances = simulate_matrix(player_ids, N, seed, _shard_table(*table_file), offset)
+        means, variances = list(means), list(variances)
+    else:
+        means = [simulate([nflgame.players[pid]], N, None, seed) for pid in player_ids]
+        variances = [np.nan] * len(player_ids)
+    return means, variances, profiling.snapshot() if instrument else None
+
+
+def simulate_players(players, N, table=None, seed=None, workers=1, offset=0):
+    """
+    This method runs the MC simulation on each player, in one batch if the weekly points are precomputed, and sharded
+    across a process pool if workers > 1. Since each player has its own random stream, the results of a process pool
+    are the same as a single process run with the same seed.
+
+    :param players: list of Player objects to simulate
+    :param N: int number of times to run the MC simulation on each player
+    :param table: ScoreTable with precomputed weekly points (optional)
+    :param seed: int, seed for the per-player random number generators (optional)
+    :param workers: int number of processes to shard the players across
+    :param offset: int, number of simulations of these players that were already run
+    :return: numpy arrays with the mean and variance of the simulated points of each player (the variance is NaN if
+             the weekly points are not precomputed)
+    """
+
+    means = np.zeros(len(players))
+    variances = np.full(len(players), np.nan)
+    if N == 0:
+        return means, variances
+
+    # Shard the players across a process pool. The workers are sent the table itself (saved to a temporary file),
+    # since they can't rely on inheriting it or on the table in SCORE_TABLE_FILE being the same one.
+    if workers > 1:
+        if seed is None:
+            seed = np.random.randint(2 ** 31)
+        shards = [list(shard) for shard in np.array_split(np.arange(len(players)), workers * 4) if len(shard)]
+        directory = tempfile.mkdtemp() if table is not None else None
+        try:
+            table_file = None
+            if table is not None:
+                table_file = (os.path.join(directory, 'score_table.npz'), table.version)
+                table.save(table_file[0])
+            progress = profiling.Progress(len(players), 'Simulated player')
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = dict((executor.submit(_simulate_shard, [players[i].player_id for i in shard], N, seed,
+                                                table_file, _scoring_profile, offset, _weighting,
+                                                profiling.is_enabled()), shard)
+                               for shard in shards)
+                for future in as_completed(futures):
+                    shard_means, shard_variances, shard_profile = future.result()
+                    means[futures[future]] = shard_means
+                    variances[futures[future]] = shard_variances
+                    if shard_profile is not None:
+                        profiling.merge(shard_profile)
+                    progress.update(len(futures[future]))
+            progress.finish()
+        finally:
+            if directory is not None:
+                shutil.rmtree(directory)
+        return means, variances
+
+    # With precomputed points, simulate every player in one batch
+    if table is not None:
+        return simulate_matrix([p.player_id for p in players], N, seed, table, offset)
+
+    # Otherwise go through each Player one at a time
+    progress = profiling.Progress(len(players), 'Simulated player')
+    for index, p in enumerate(players):
+        means[index] = simulate([p], N, table, seed)
+        progress.update()
+    progress.finish()
+    return means, variances
+
+
+def simulate_cached(players, N, table, seed, cache, workers=1):
+    """
+    This method runs the MC simulation on each player, reusing the results stored in the cache. Players that were
+    already simulated at least N times are not simulated again, and players that were simulated fewer times only run
+    the extra simulations, which are merged into the stored mean and variance.
+
+    :param players: list of Player objects to simulate
+    :param N: int number of times to run the MC simulation on each player
+    :param table: ScoreTable with precomputed weekly points
+    :param seed: int, seed for the per-player random number generators
+    :param cache: SimulationCache to read and store results
+    :param workers: int number of processes to shard the players across
+    :return: numpy arrays with the mean and variance of the simulated points of each player
+    """
+
+    keys = [cache.key(p.player_id, seed, _scoring_weights, table.version+_weighting.key()) for p in players]
+    entries = [cache.get(key) or (0, 0.0, 0.0) for key in keys]
+    means = np.array([entry[1] for entry in entries], dtype=np.float64)
+    variances = np.array([entry[2] / entry[0] if entry[0] else np.nan for entry in entries])
+
+    # Group the players that need more simulations by how many they already have
+    needed = {}
+    for i, entry in enumerate(entries):
+        if entry[0] < N:
+            needed.setdefault(entry[0], []).append(i)
+            profiling.count('cache misses' if entry[0] == 0 else 'cache partial hits')
+        else:
+            profiling.count('cache hits')
+
+    for offset, indices in needed.items():
+        new_means, new_variances = simulate_players([players[i] for i in indices], N - offset, table, seed, workers,
+                                                    offset)
+        for i, mean, variance in zip(indices, new_means, new_variances):
+            count, mean, m2 = merge_moments(offset, entries[i][1], entries[i][2], N - offset, mean,
+                                            variance * (N - offset))
+            cache.put(keys[i], count, mean, m2)
+            means[i] = mean
+            variances[i] = m2 / count
+
+    cache.evict()
+    return means, variances
+
+
+def players_to_df(players, N, table=None, seed=None, workers=1, cache=None, tolerance=None, leagues=None,
+                  roster_positions=()):
     """
     This method takes in a list of Players and puts this information into a pandas df. It also calls the function to
     run the MC simulation on each player so that the information is available in the df.
 
     :param players: list of Player objects to be included in the df
     :param N: int number of times to run the MC simulation on each player
-    :return: pandas dataframe with information on each Player
+    :param table: ScoreTable with precomputed weekly points (optional)
+    :param seed: int, seed for the per-player random number generators (optional)
+    :param workers: int number of processes to shard the players across (the adaptive simulation runs in one)
+    :param cache: SimulationCache to reuse earlier results from (only used with a table and a seed)
+    :param tolerance: float, simulate adaptively until each mean is within this many points, running at most N
+                      simulations per player (only used with a table, see simulate_adaptive)
+    :param leagues: list of LeagueConfigs the adaptive simulation is for ([DEFAULT_LEAGUE] if None)
+    :param roster_positions: positions of the players already on the roster (used by the adaptive simulation)
+    :return: pandas dataframe with information on each Player (including the mean and variance of the simulated points)
     """
 
-    # Initialize empty dataframe
-    df = pd.DataFrame(columns=['full_name','team','position','points','player_object'])
-
-    # Go through each Player in the list of players, and add their information to the dataframe
-    for index, p in enumerate(players):
-        if N != 0:
-            print('Simulating player '+str(index+1)+' of '+str(len(players)))
-        df.loc[p.player_id] = [p.full_name, p.team, p.position, simulate([p], N), p]
-    return df
+    # Run the MC simulation on every player
+    if tolerance is not None and table is not None and N != 0:
+        if workers > 1:
+            raise ValueError('The adaptive simulation runs in a single process, it can not use '+str(workers)+
+                             ' workers')
+        cache = cache if seed is not None else None
+        means, variances, counts = simulate_adaptive(players, table, seed, tolerance, N, ADAPTIVE_BATCH,
+                                                     roster_positions, leagues=leagues, cache=cache)
+        share = 100.0 * counts.sum() / max(1, N * len(players))
+        print('Ran '+str(int(counts.sum()))+' simulations ('+str(int(round(share)))+'% of '+str(N)+' per player).')
+    elif cache is not None and table is not None and seed is not None and N != 0:
+        means, variances = simulate_cached(players, N, table, seed, cache, workers)
+    else:
+        means, variances = simulate_players(players, N, table, seed, workers)
+
+    # Collect the information of each Player in the list of players, then build the dataframe in one step
+    records = [(p.full_name, p.team, p.position, points, variance, p)
+               for p, points, variance in zip(players, means, variances)]
+    return pd.DataFrame.from_records(records, index=pd.Index([p.player_id for p in players], name='player_id'),
+                                     columns=['full_name','team','position','points','variance','player_object'])
 
 
 def football_pos_to_ff_pos(position):
@@ -221,24 +800,185 @@ def football_pos_to_ff_pos(position):
     'D/ST'
     """
 
-    if position == 'QB':
-        return 'QB'
-    elif position == 'RB':
-        return 'RB'
-    elif position == 'WR':
-        return 'WR'
-    elif position == 'TE':
-        return 'TE'
-    elif position == 'K':
-        return 'K'
-    elif position in ['DB', 'DE', 'DT', 'CB', 'LS', 'LB', 'P', 'ILB', 'OLB', 'T', 'NT']:
-        return 'D/ST'
-
     # If the position is not in the list, return None
-    return None
+    return FF_POSITIONS.get(position)
+
+
+class LeagueConfig(object):
+    """
+    This class holds the roster rules of a league: the number of players on a full roster, the [min,max] number of
+    players in each position group, and the positions that can fill the flex spots. The position groups are kept in a
+    fixed order, with lookup tables from positions to the index of their group, so that rosters can be checked on
+    lists of counts (see RosterState).
+    """
 
+    def __init__(self, name='default', roster_size=ROSTER_SIZE, restrictions=None, flex_positions=None,
+                 flex_spots=FLEX_SPOTS):
+        """
+        :param name: string, name of the league (used to name its results)
+        :param roster_size: int, number of players on a full roster
+        :param restrictions: dict mapping position groups (see FF_POSITIONS) to the [min,max] number of players in
+                             the group, groups that are left out can't be picked (TEAM_RESTRICTIONS if None)
+        :param flex_positions: list of positions that can fill the flex spots (FLEX_POSITIONS if None)
+        :param flex_spots: int, number of flex spots
+        """
+
+        restrictions = TEAM_RESTRICTIONS if restrictions is None else restrictions
+        flex_positions = FLEX_POSITIONS if flex_positions is None else flex_positions
+
+        # Make sure the rules can be met at all
+        for group, (low, high) in restrictions.items():
+            if group not in FF_POSITIONS.values():
+                raise ValueError('Unknown position group in league '+str(name)+': '+str(group))
+            if not 0 <= low <= high:
+                raise ValueError('Bad [min,max] for '+str(group)+' in league '+str(name)+': '+str([low, high]))
+        for position in flex_positions:
+            if FF_POSITIONS.get(position) not in restrictions:
+                raise ValueError('Flex position '+str(position)+' is not in a position group of league '+str(name))
+        if flex_spots > 0 and not flex_positions:
+            raise ValueError('League '+str(name)+' has '+str(flex_spots)+' flex spots but no flex positions')
+        if flex_spots < 0 or sum(low for low, high in restrictions.values()) + flex_spots > roster_size:
+            raise ValueError('The position minimums and flex spots of league '+str(name)+' need more than '+
+                             str(roster_size)+' players')
+        if sum(high for low, high in restrictions.values()) + flex_spots < roster_size:
+            raise ValueError('The position maximums and flex spots of league '+str(name)+' can not fill '+
+                             str(roster_size)+' players')
+
+        self.name = name
+        self.roster_size = roster_size
+        self.restrictions = dict((group, [low, high]) for group, (low, high) in restrictions.items())
+        self.flex_positions = list(flex_positions)
+        self.flex_spots = flex_spots
+
+        # Position groups in a fixed order, and lookup tables from positions to the index of their group
+        self.groups = sorted(self.restrictions)
+        self.group_min = [self.restrictions[group][0] for group in self.groups]
+        self.group_max = [self.restrictions[group][1] for group in self.groups]
+        self.group_index = dict((pos, self.groups.index(group)) for pos, group in FF_POSITIONS.items()
+                                if group in self.restrictions)
+        self.flex_group_indices = sorted(set(self.group_index[pos] for pos in self.flex_positions))
+
+        # Every way that 0 to flex_spots flex players can be split over the flex groups, as the number of players each
+        # group gives up to the flex spots
+        self.flex_splits = [[] for used in range(flex_spots + 1)]
+        for split in itertools.product(range(flex_spots + 1), repeat=len(self.flex_group_indices)):
+            if sum(split) <= flex_spots:
+                deduct = [0] * len(self.groups)
+                for i, n in zip(self.flex_group_indices, split):
+                    deduct[i] = n
+                self.flex_splits[sum(split)].append(deduct)
+
+    def __repr__(self):
+        return 'LeagueConfig(%r, roster_size=%r, restrictions=%r, flex_positions=%r, flex_spots=%r)' \
+               % (self.name, self.roster_size, self.restrictions, self.flex_positions, self.flex_spots)
+
+
+# League with the rules this program has always used
+DEFAULT_LEAGUE = LeagueConfig()
+
+
+class RosterState(object):
+    """
+    This class keeps track of how many players are in each position group of a roster, so that checking whether a new
+    player can be legally added does not require looking at every player on the roster again. The flex spots are given
+    to whichever flex groups keep the roster legal.
+    """
 
-def can_add_player(roster, new_position):
+    __slots__ = ('counts', 'remaining', 'league')
+
+    def __init__(self, positions=(), league=None):
+        """
+        :param positions: positions of the players already on the roster
+        :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+        """
+
+        self.league = league or DEFAULT_LEAGUE
+        self.counts = [0] * len(self.league.groups)
+        self.remaining = self.league.roster_size
+        for position in positions:
+            self.add(position)
+
+    def copy(self):
+        """
+        :return: RosterState with the same counts as this one
+        """
+        state = RosterState(league=self.league)
+        state.counts = list(self.counts)
+        state.remaining = self.remaining
+        return state
+
+    def can_add(self, position):
+        """
+        This method looks at the rules about how a fantasy football team can be arranged, and checks that these rules
+        are still satisfied if a player with this position is added.
+
+        :param position: string, position of player to be added to team
+        :return: boolean, indicating whether or not this player can be legally added to the roster
+        """
+
+        # If the position is not in the list of fantasy positions, or the roster is full, we can't add the player
+        group = self.league.group_index.get(position)
+        if group is None or self.remaining <= 0:
+            return False
+
+        # Simulate the new position being added to the roster
+        self.counts[group] += 1
+        legal = _is_legal(self.counts, self.remaining - 1, self.league)
+        self.counts[group] -= 1
+        return legal
+
+    def add(self, position):
+        """
+        :param position: string, position of player added to the team
+        """
+        group = self.league.group_index.get(position)
+        if group is not None:
+            self.counts[group] += 1
+        self.remaining -= 1
+
+    def remove(self, position):
+        """
+        :param position: string, position of player removed from the team
+        """
+        group = self.league.group_index.get(position)
+        if group is not None:
+            self.counts[group] -= 1
+        self.remaining += 1
+
+
+def _is_legal(counts, remaining, league=None):
+    """
+    This method checks that a roster with these position group counts does not break any of the position limits, and
+    that the open spots are enough to still reach the position minimums and fill the flex spots. Flex players fill as
+    many of the flex spots as they can, and do not count towards their groups.
+
+    :param counts: list of ints, number of players in each position group of the league
+    :param remaining: int, number of open spots left on the roster
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :return: boolean, indicating whether or not the roster is legal
+    """
+
+    league = league or DEFAULT_LEAGUE
+    group_min, group_max, flex_spots = league.group_min, league.group_max, league.flex_spots
+    flex_players = 0
+    for i in league.flex_group_indices:
+        flex_players += counts[i]
+    used = flex_players if flex_players < flex_spots else flex_spots
+    for deduct in league.flex_splits[used]:
+        min_players_needed = flex_spots - used
+        for i in range(len(counts)):
+            count = counts[i] - deduct[i]
+            if count < 0 or count > group_max[i]:
+                break
+            if count < group_min[i]:
+                min_players_needed += group_min[i] - count
+        else:
+            if min_players_needed <= remaining:
+                return True
+    return False
+
+
+def can_add_player(roster, new_position, league=None):
     """
     This method takes in the current roster, and the position of a new player that the program is trying to add to the
     roster. Essentially, this method looks at the rules about how a fantasy football team can be arranged, and ensures
@@ -246,89 +986,239 @@ def can_add_player(roster, new_position):
 
     :param roster: pandas DataFrame containing the current team
     :param new_position: string, position of player to be added to team
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
     :return: boolean, indicating whether or not this player can be legally added to the roster
     """
 
-    # If the position is blank, or not in the list of fantasy positions, we cannot add the player to the roster
-    if new_position == '' or not football_pos_to_ff_pos(new_position):
-        return False
+    return RosterState(roster['position'], league).can_add(new_position)
 
-    # If we already have a full roster, we can't add another player
-    if len(roster.index) >= 16:
-        return False
 
-    # This is the [min,max] number of players that can be in each position group.
-    team_restrictions = {'QB': [1, 4],
-                         'RB': [2, 8],
-                         'WR': [2, 8],
-                         'TE': [1, 3],
-                         'K': [1, 3],
-                         'D/ST': [1, 3]}
+def build_optimal_team(roster, available_players, method='greedy', league=None):
+    """
+    This method takes in the current roster, as well as the list of available players to choose from. The list of
+    available players is sorted in descending order by the number of points each player earned in the MC simulation. The
+    method then moves through the dataframe, picking off the highest scoring players. If the player can legally be added
+    to the team, the player is added. Otherwise, we move on to the next player until we have a full team. With
+    method='exact', the roster is instead solved for the highest possible total points (see solve_optimal_team).
 
-    # Indicates if we have used our flex spot yet (flex can be WR, RB, or TE)
-    flex_used = False
+    :param roster: pandas dataframe with players currently on the fantasy team
+    :param available_players: pandas dataframe with all available players (including points earned in MC simulation)
+    :param method: string, 'greedy' or 'exact'
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :return: pandas dataframe with full roster of optimized team
+    """
 
-    # Go through each row in the roster, and subtract the positions of the players on the roster from the
-    # team_restrictions (unless the player qualifies as flex (this can be used only once)).
-    for index, row in roster.iterrows():
-        if football_pos_to_ff_pos(row['position']):
-            if row['position'] in ['TE','RB','WR'] and not flex_used:
-                flex_used = True
-                continue
+    if method == 'exact':
+        return solve_optimal_team(roster, available_players, league)
+    elif method != 'greedy':
+        raise ValueError('Unknown optimization method: '+str(method))
 
-            pos = football_pos_to_ff_pos(row['position'])
-            team_restrictions[pos] -= np.ones(2)
+    # Pick from the players that are not on the roster yet, in descending order by the points they earned in the MC
+    # simulation (see greedy_picks)
+    candidates = available_players[~available_players.index.isin(roster.index)]
+    points = candidates['points'].values.astype(np.float64)
+    picked = greedy_picks(list(candidates['position'].values), points, roster['position'], league)
+    order = np.argsort(-points, kind='mergesort')
+    return add_to_roster(roster, candidates, list(candidates.index[order[picked[order]]]))
 
-    # Simulate the new position being added to the roster
-    team_restrictions[football_pos_to_ff_pos(new_position)] -= np.ones(2)
 
-    # If we've surpassed the maximum number of players allowed in one position group, v[1] will be negative, indicating
-    # that we cannot legally add this player
-    for v in team_restrictions.values():
-        if v[1] < 0:
-            return False
+def solve_optimal_team(roster, available_players, league=None):
+    """
+    This method finds the roster with the highest possible total points under the same rules as can_add_player. Within
+    a position group it is always best to take the highest scoring players, so the only real decision is how many
+    players to take from each group. This is solved exactly with a dynamic program over the position groups (a bounded
+    knapsack on the number of open roster spots), once for each way the flex spots can be split over the flex groups.
 
-    # This part of the function essentially finds the minimum number of players we could possibly take and still legally
-    # have a team. If we take a player that makes it so that we cannot have a legal team anymore, False will be
-    # returned. For example, if we have no RB's yet, and only two spots left on the team, we cannot take another player
-    # that is not an RB since we need a minimum of two RB's for a legal team.
-    min_players_needed = 0
-    for key in team_restrictions:
-        if team_restrictions[key][0] > 0:
-            min_players_needed += team_restrictions[key][0]
-    if 16 - len(roster.index) <= min_players_needed:
-        return False
+    :param roster: pandas dataframe with players currently on the fantasy team
+    :param available_players: pandas dataframe with all available players (including points earned in MC simulation)
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :return: pandas dataframe with full roster of optimized team
+    """
+
+    league = league or DEFAULT_LEAGUE
+    groups = range(len(league.groups))
+
+    # Number of players already on the roster in each group
+    on_roster = RosterState(roster['position'], league).counts
+
+    # Candidates of each group sorted by points, and the total points of taking the best k of them
+    candidates = available_players[~available_players.index.isin(roster.index)]
+    candidates = candidates.sort_values(by='points', ascending=False)
+    candidate_groups = candidates['position'].map(lambda position: league.group_index.get(position, -1))
+    best = {}
+    totals = {}
+    for group in groups:
+        best[group] = candidates.index[(candidate_groups == group).values]
+        totals[group] = np.concatenate([[0.0], np.cumsum(candidates.loc[best[group], 'points'].values)])
+
+    open_spots = league.roster_size - len(roster.index)
+
+    # Fill as many spots as possible, the position minimums only have to hold for a full roster
+    for size in range(open_spots, -1, -1):
+        full = len(roster.index) + size == league.roster_size
+        solution = None
+
+        # The flex groups hold the flex players, above their limits
+        for deduct in league.flex_splits[league.flex_spots]:
+
+            # Range of new players that can be taken from each group
+            ranges = []
+            for group in groups:
+                low = league.group_min[group] + deduct[group]
+                high = league.group_max[group] + deduct[group]
+                low = max(0, low - on_roster[group]) if full else 0
+                high = min(high - on_roster[group], len(best[group]))
+                ranges.append((low, high))
+
+            # dp[k] is the best total points of taking exactly k new players from the groups seen so far
+            dp = {0: (0.0, [])}
+            for group, (low, high) in zip(groups, ranges):
+                next_dp = {}
+                for taken, (value, counts) in dp.items():
+                    profiling.count('optimizer iterations', max(0, min(high, size - taken) + 1 - low))
+                    for count in range(low, min(high, size - taken) + 1):
+                        total = value + totals[group][count]
+                        key = taken + count
+                        if key not in next_dp or total > next_dp[key][0]:
+                            next_dp[key] = (total, counts + [count])
+                dp = next_dp
+
+            if size in dp and (solution is None or dp[size][0] > solution[0]):
+                solution = dp[size]
+
+        if solution is not None:
+            break
 
-    # If we've made it this far, then adding this player won't violate any rules
-    return True
+    # If the roster already breaks the rules, there is nothing that can be added
+    if solution is None:
+        return roster.copy(deep=True)
 
+    # Add the best players of each group to the roster
+    picked = []
+    for group, count in zip(groups, solution[1]):
+        picked.extend(best[group][:count])
+    return add_to_roster(roster, candidates, picked)
 
-def build_optimal_team(roster, available_players):
+
+def add_to_roster(roster, available_players, picked):
     """
-    This method takes in the current roster, as well as the list of available players to choose from. The list of
-    available players is sorted in descending order by the number of points each player earned in the MC simulation. The
-    method then moves through the dataframe, picking off the highest scoring players. If the player can legally be added
-    to the team, the player is added. Otherwise, we move on to the next player until we have a full team.
+    This method builds a new roster from the current roster and the picked players, in one step rather than one row
+    at a time.
 
     :param roster: pandas dataframe with players currently on the fantasy team
-    :param available_players: pandas dataframe with all available players (including points earned in MC simulation)
-    :return: pandas dataframe with full roster of optimized team
+    :param available_players: pandas dataframe the picked players are taken from
+    :param picked: list of player_ids to add to the roster
+    :return: pandas dataframe with the roster and the picked players (with the columns of the roster)
     """
 
-    current_roster = roster.copy(deep=True)
-    # First, sort the players in descending order by the points they earned in the MC simulation
-    available_players = available_players.sort_values(by='points', ascending=False)
+    rows = available_players.loc[picked].reindex(columns=roster.columns)
+    if len(roster.index) == 0:
+        return rows
+    return pd.concat([roster, rows])
 
-    for index, row in available_players.iterrows():
 
-        # If we can legally add this player, add them to the roster
-        if can_add_player(current_roster, row['position']):
-            current_roster.loc[index] = [row['full_name'], row['team'], row['position'], row['points'], row['player_object']]
+def simulate_rosters(rosters, N, table=None, seed=None):
+    """
+    This method simulates the weekly score of whole rosters. In each of the N draws every player on a roster plays the
+    same (year, week), drawn with the current weighting model, and a player that did not play that week scores 0. This
+    keeps the correlation between players that score together (e.g. a QB and his WR), which the sum of independent
+    player means can't show. All of the rosters are scored in one batch on the same draws, so differences between them
+    come from the players rather than the luck of the draw (see team_simulation.roster_distributions).
+
+    :param rosters: list of rosters, each a list of player_ids
+    :param N: int, number of weeks to draw
+    :param table: ScoreTable with precomputed weekly points (loaded from SCORE_TABLE_FILE if None)
+    :param seed: int, seed for the random number generator (optional)
+    :return: pandas dataframe with the mean, std, quantiles and cvar of the weekly score of each roster
+    """
+
+    if table is None:
+        table = load_score_table()
+    rng = np.random.RandomState(seed)
+
+    # Only the weeks that can be drawn in the simulation count
+    columns = [table.column(year, week) for year in YEARS for week in WEEKS]
+    columns = np.array([column for column in columns if column is not None], dtype=np.int64)
+    weeks = columns[team_simulation.draw_weeks([table.weeks[c] for c in columns], _weighting, N, rng)]
+    rows = [[table.row(player_id) for player_id in roster] for roster in rosters]
+    return team_simulation.roster_distributions(table.points, rows, weeks)
+
 
-        # If the size of the team is 16, the team is full
-        if len(current_roster.index) >= 16:
-            return current_roster
-    return current_roster
+def candidate_rosters(roster, available_players, count, seed=None, spread=1.0, league=None):
+    """
+    This method builds candidate rosters to choose from by filling the roster greedily from perturbed points. Each
+    player's points are moved by random noise on the scale of how far a season of their weekly scores could be off
+    (spread * std / sqrt(weeks)), so the candidates are the rosters that are plausibly the best. The first candidate
+    uses the points as they are.
+
+    :param roster: pandas dataframe with players currently on the fantasy team
+    :param available_players: pandas dataframe with all available players (including points and variance)
+    :param count: int, number of rosters to try (duplicates are only returned once)
+    :param seed: int, seed for the random number generator (optional)
+    :param spread: float, scale of the noise
+    :param league: LeagueConfig with the roster rules (DEFAULT_LEAGUE if None)
+    :return: list of rosters, each a list of player_ids (starting with the players on the roster)
+    """
+
+    candidates = available_players[~available_players.index.isin(roster.index)]
+    positions = list(candidates['position'].values)
+    points = candidates['points'].values.astype(np.float64)
+    variance = candidates['variance'].values if 'variance' in candidates.columns else np.zeros(len(points))
+    scale = spread * np.sqrt(np.nan_to_num(np.asarray(variance, dtype=np.float64)) / len(WEEKS))
+
+    # A player with more players of their group ahead of them than the group can hold, even when the noise goes their
+    # way (within 6 standard deviations), is never picked, so they are left out
+    league = league or DEFAULT_LEAGUE
+    state = RosterState(roster['position'], league)
+    groups = np.array([league.group_index.get(position, -1) for position in positions], dtype=np.int64)
+    plausible = np.zeros(len(points), dtype=bool)
+    for group in range(len(league.groups)):
+        in_group = np.flatnonzero(groups == group)
+        spots = league.group_max[group] - state.counts[group]
+        spots += league.flex_spots if group in league.flex_group_indices else 0
+        worst_case = np.sort(points[in_group] - 6 * scale[in_group])
+        ahead = len(in_group) - np.searchsorted(worst_case, points[in_group] + 6 * scale[in_group], side='right')
+        plausible[in_group] = ahead < spots
+    candidates = candidates[plausible]
+    positions = [position for position, keep in zip(positions, plausible) if keep]
+    points, scale = points[plausible], scale[plausible]
+    rng = np.random.RandomState(seed)
+
+    rosters = []
+    seen = set()
+    for i in range(count):
+        perturbed = points + rng.standard_normal(len(points)) * scale if i else points
+        picked = tuple(candidates.index[greedy_picks(positions, perturbed, roster['position'], league)])
+        if picked not in seen:
+            seen.add(picked)
+            rosters.append(list(roster.index) + list(picked))
+    return rosters
+
+
+def build_risk_aware_team(roster, available_players, N, risk_aversion, candidates=1000, seed=None, table=None,
+                          method='greedy'):
+    """
+    This method picks the roster with the best trade-off between its mean weekly score and its downside risk (the
+    average of its worst weeks, see team_simulation.risk_adjusted). The roster of build_optimal_team and the candidates
+    of candidate_rosters are all simulated together with simulate_rosters.
+
+    :param roster: pandas dataframe with players currently on the fantasy team
+    :param available_players: pandas dataframe with all available players (including points and variance)
+    :param N: int, number of weeks to draw for each roster
+    :param risk_aversion: float between 0 (only the mean counts) and 1 (only the downside risk counts)
+    :param candidates: int, number of candidate rosters to try
+    :param seed: int, seed for the random number generators (optional)
+    :param table: ScoreTable with precomputed weekly points (loaded from SCORE_TABLE_FILE if None)
+    :param method: string, optimizer for the first candidate ('greedy' or 'exact', see build_optimal_team)
+    :return: pandas dataframe with the chosen roster, the distributions of every candidate (the first row is the roster
+             of build_optimal_team), and the row of the chosen roster
+    """
+
+    rosters = [list(build_optimal_team(roster, available_players, method).index)]
+    rosters += [r for r in candidate_rosters(roster, available_players, candidates, seed) if set(r) != set(rosters[0])]
+    distributions = simulate_rosters(rosters, N, table, seed)
+    best = int(np.argmax(team_simulation.risk_adjusted(distributions, risk_aversion).values))
+    return add_to_roster(roster, available_players, rosters[best][len(roster.index):]), distributions, best
 
 
 def remove_undesired_players(players):
@@ -373,6 +1263,7 @@ def get_desired_players(all_available_players):
 
     # Initialize empty players list that will contains the players the user picks
     players = []
+    state = RosterState()
 
     # Prompt user for player names
     print('Are there any players you know you want on your team? (blank if none)')
@@ -388,8 +1279,9 @@ def get_desired_players(all_available_players):
         if new_player:
 
             # and we are legally allowed to add this player to the team, add them
-            if can_add_player(players_to_df(players, 0), new_player.position):
+            if state.can_add(new_player.position):
                 players.append(new_player)
+                state.add(new_player.position)
                 all_available_players.remove(new_player)
             else:
                 print('Cannot add player.')
@@ -408,6 +1300,46 @@ def get_desired_players(all_available_players):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build an optimal fantasy football roster with MC simulations.')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes to simulate players with')
+    parser.add_argument('--seed', type=int, default=None, help='seed for reproducible simulations')
+    parser.add_argument('--scoring', default=scoring.DEFAULT_PROFILE,
+                        help='scoring profile: '+', '.join(sorted(scoring.PROFILES))+' or a JSON file')
+    parser.add_argument('--cache', default=None,
+                        help='folder to store simulation results in and reuse them from (needs --seed)')
+    parser.add_argument('--csv', action='store_true', help='also export the simulated players as a CSV file')
+    parser.add_argument('--prune', action='store_true',
+                        help="also skip players whose best week can't crack the roster")
+    parser.add_argument('--years', type=int, nargs=2, default=[YEARS[0], YEARS[-1]], metavar=('FIRST', 'LAST'),
+                        help='seasons to sample weeks from')
+    parser.add_argument('--half-life', type=float, default=None,
+                        help='weight weeks by recency, halving every this many seasons')
+    parser.add_argument('--method', choices=['greedy', 'exact'], default='greedy',
+                        help='greedy picks, or an exactly optimal roster')
+    parser.add_argument('--adaptive', type=float, default=None, metavar='TOLERANCE',
+                        help='stop simulating a player once their mean is within TOLERANCE points (95%% confidence, '
+                             'e.g. 0.05) near the roster cutoff, running at most N simulations per player')
+    parser.add_argument('--risk-aversion', type=float, default=None, metavar='WEIGHT',
+                        help='pick the roster by simulating whole weeks, weighing the average of its worst weeks by '
+                             'WEIGHT (0 to 1) against its mean')
+    parser.add_argument('--candidates', type=int, default=1000, help='rosters to compare with --risk-aversion')
+    parser.add_argument('--profile', action='store_true',
+                        help='count and time every stage, and print a summary at the end')
+    parser.add_argument('--trace', default=None, metavar='FILE',
+                        help='write a cProfile trace of the run to FILE (e.g. lineup.prof)')
+    args = parser.parse_args()
+    profiling.enable(args.profile)
+    set_scoring_profile(args.scoring)
+    if args.half_life is not None:
+        set_weighting_model(ExponentialDecay(args.half_life))
+    elif args.years != [YEARS[0], YEARS[-1]]:
+        parser.error('--years needs --half-life, the default season weights only cover '+str(YEARS))
+    if args.cache and args.seed is None:
+        parser.error('--cache needs --seed, results of unseeded simulations can not be reused')
+    if args.adaptive is not None and args.workers > 1:
+        parser.error('--adaptive runs in a single process, it can not be used with --workers')
+    YEARS = range(args.years[0], args.years[1] + 1)
+
     # First, get a list of all the active players
     all_available_players = get_active_players()
 
@@ -427,21 +1359,63 @@ if __name__ == "__main__":
         if isinstance(N, (int, long)) and N > 0:
             break
 
-    # Initialize empty roster
-    roster = pd.DataFrame(columns=['full_name','team','position','points','player_object'])
-
-    # Add the user-selected players to the roster
-    for p in user_desired_players:
-        roster.loc[p.player_id] = [p.full_name, p.team, p.position, simulate([p], N), p]
+    # Record a cProfile trace of everything after the prompts (if asked for)
+    trace = profiling.Trace(args.trace)
+    trace.start()
+
+    # Load the weekly fantasy points of every player (built once from nflgame on the first run)
+    with profiling.timer('stage: load score table'):
+        table = load_score_table()
+
+    # Don't simulate players that could never make the roster
+    with profiling.timer('stage: prune candidates'):
+        candidates, report = prune_candidates(all_available_players, table, N,
+                                              [p.position for p in user_desired_players], args.prune)
+    print('Skipping '+str(len(all_available_players) - len(candidates))+' of '+str(len(all_available_players))+
+          ' players ('+str(report['ineligible_position'])+' ineligible positions, '+str(report['no_games'])+
+          ' without games, '+str(report['below_cutoff'])+' below the roster cutoff), saving '+
+          str(report['simulations_saved'])+' simulations.')
+
+    # Build the roster from the user-selected players
+    roster = pd.DataFrame.from_records([(p.full_name, p.team, p.position, simulate([p], N, table, args.seed), p)
+                                        for p in user_desired_players],
+                                       index=pd.Index([p.player_id for p in user_desired_players], name='player_id'),
+                                       columns=['full_name','team','position','points','player_object'])
 
     # Turn the list of available players into a df with the MC simulation points
-    all_available_players_df = players_to_df(all_available_players, N)
-    all_available_players_df.to_csv(str(N)+'_sim_all_players')
+    cache = SimulationCache(args.cache) if args.cache else None
+    with profiling.timer('stage: simulate players'):
+        all_available_players_df = players_to_df(candidates, N, table, args.seed, args.workers, cache, args.adaptive,
+                                                 roster_positions=[p.position for p in user_desired_players])
+    if cache is not None:
+        print('Simulation cache: '+', '.join(k+' '+str(v) for k, v in sorted(cache.stats().items())))
+    save_player_pool(all_available_players_df, str(N)+'_sim_all_players'+POOL_EXTENSION)
+    if args.csv:
+        all_available_players_df.to_csv(str(N)+'_sim_all_players', index_label='player_id')
 
     # Use the available players df to construct an optimal team
-    roster = build_optimal_team(roster, all_available_players_df)
+    with profiling.timer('stage: optimize roster'):
+        if args.risk_aversion is None:
+            roster = build_optimal_team(roster, all_available_players_df, args.method)
+        else:
+            roster, distributions, best = build_risk_aware_team(roster, all_available_players_df, N,
+                                                                args.risk_aversion, args.candidates, args.seed,
+                                                                table, args.method)
+    trace.stop()
+
+    # Show how the weekly score of the chosen roster compares with the roster with the most points
+    if args.risk_aversion is not None:
+        print('Weekly team score of '+str(len(distributions.index))+' candidate rosters:')
+        compared = distributions.iloc[[0, best]]
+        compared.index = ['most points', 'chosen']
+        print(tabulate(compared, headers='keys', tablefmt='psql', floatfmt='.2f'))
 
     # Record the roster for later access and print
     roster = roster.sort_values(by='points', ascending=False)
-    roster.to_csv(str(N)+'_sim_optimal_team')
+    roster.to_csv(str(N)+'_sim_optimal_team', index_label='player_id')
     print(tabulate(roster, headers='keys', tablefmt='psql'))
+
+    if args.profile:
+        print(profiling.summary())
+    if args.trace:
+        print('Wrote cProfile trace to '+args.trace+' (view with snakeviz or python -m pstats)')
@@ -1,8 +1,10 @@
-import pandas as pd
+import argparse
 import numpy as np
 from tabulate import tabulate
 import lineup_optimizer
-import nflgame
+from draft_board import DraftBoard
+from draft_server import serve
+from player_pool import load_players
 import os.path
 
 
@@ -17,33 +19,40 @@ def format_optimal_roster(user_roster, optimal_roster):
     :return: pandas dataframe containing optimal roster with user-picked players indicated
     """
 
-    # Create copies of the df so as to not change the original
-    uro = user_roster.copy(deep=True)
+    # Create a copy of the df so as to not change the original
     opt = optimal_roster.copy(deep=True)
 
-    # Go through each player in the users rosters and marked the players that have been picked
-    opt['picked'] = ''
-    for index, row in opt.iterrows():
-        if index in uro.index:
-            opt.loc[index, 'picked'] = 'Y'
+    # Mark the players in the optimal roster that are already on the users roster
+    opt['picked'] = np.where(opt.index.isin(user_roster.index), 'Y', '')
     return opt
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Keep track of the optimal roster during a live draft.')
+    parser.add_argument('--file', help='file with all players (asked for if not given)')
+    parser.add_argument('--serve', action='store_true',
+                        help='take picks over HTTP instead of from the keyboard (see draft_server.py)')
+    parser.add_argument('--host', default='127.0.0.1', help='address the server listens on')
+    parser.add_argument('--port', type=int, default=8765, help='port the server listens on')
+    args = parser.parse_args()
+
     # Get name of file to use from user
-    while True:
-        filename = raw_input('Enter name of file to use (should have all players): ')
-        if os.path.isfile(filename):
-            break
-        else:
+    filename = args.file
+    while not filename or not os.path.isfile(filename):
+        if filename:
             print('Could not find file: '+filename)
+        filename = raw_input('Enter name of file to use (should have all players): ')
 
-    # Load pandas df from csv
-    available_players = pd.read_csv(filename).set_index('player_id')
+    # Load pandas df (memory-mapped from the binary format, or from a csv)
+    available_players = load_players(filename)
 
-    # Initialize empty rosters
-    user_roster = pd.DataFrame(columns=['full_name', 'team', 'position', 'points', 'player_object'])
-    optimal_roster = pd.DataFrame(columns=['full_name', 'team', 'position', 'points', 'player_object'])
+    # Let league members and scripts push picks to the server instead
+    if args.serve:
+        serve(available_players, args.host, args.port)
+        raise SystemExit
+
+    # Keep the available players presorted, along with the users roster and the optimal roster
+    board = DraftBoard(available_players)
 
     # Begin the draft
     draft = True
@@ -63,14 +72,14 @@ if __name__ == "__main__":
                 player_to_remove = lineup_optimizer.validate_player(picked_player_name)
             if picked_player_name == '':
                 break
-            available_players = available_players.drop(player_to_remove.player_id)
+            if not board.remove(player_to_remove.player_id):
+                print(str(picked_player_name)+' is not available.')
             picked_player_name = raw_input('Player picked by other league member: ')
 
-        # Build optimal roster and display to user
-        optimal_roster = lineup_optimizer.build_optimal_team(user_roster, available_players)
+        # Show the optimal roster (kept up to date as players are drafted) to the user
         print('')
         print('Optimal roster: ')
-        print(tabulate(format_optimal_roster(user_roster,optimal_roster), headers='keys', tablefmt='psql'))
+        print(tabulate(format_optimal_roster(board.roster(), board.optimal_roster()), headers='keys', tablefmt='psql'))
 
         # Get the users pick
         picked_player = None
@@ -84,18 +93,19 @@ if __name__ == "__main__":
                 continue
 
             # Determine if we can add this player before adding them
-            if lineup_optimizer.can_add_player(user_roster, picked_player.position):
-                user_roster = user_roster.append(available_players.loc[picked_player.player_id])
-            else:
+            if not board.is_available(picked_player.player_id):
+                print(picked_player_name+' is not available.')
+                picked_player = None
+            elif not board.pick(picked_player.player_id):
                 print('Cannot add another '+str(picked_player.position))
                 picked_player = None
 
         # Show the user their roster
         print('')
         print('Your current roster: ')
-        print(tabulate(user_roster, headers='keys', tablefmt='psql'))
+        print(tabulate(board.roster(), headers='keys', tablefmt='psql'))
 
         # Check if the draft is over
-        if len(user_roster.index) >= 16:
+        if board.roster_full():
             draft = False
             print('Draft complete.')
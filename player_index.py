@@ -0,0 +1,102 @@
+import re
+
+
+def normalize_name(name):
+    """
+    This method puts a player name in a form that ignores case, punctuation and extra spaces, so that names typed by
+    the user can be matched against the player database.
+
+    :param name: string, name of a player
+    :return: string, normalized name
+
+    >>> normalize_name("  Le'Veon  Bell ")
+    'leveon bell'
+
+    >>> normalize_name('T.J. Yeldon')
+    'tj yeldon'
+    """
+    return ' '.join(re.sub(r"[.'`-]", '', name.lower()).split())
+
+
+def trigrams(name):
+    """
+    :param name: string, normalized name of a player
+    :return: set of the three letter sequences in the name (padded so that short names still have some)
+
+    >>> sorted(trigrams('bell'))
+    ['  b', ' be', 'bel', 'ell', 'll ']
+    """
+    padded = '  ' + name + ' '
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class PlayerIndex(object):
+    """
+    This class is an in-memory index of the player database, built once so that looking up a player by name does not
+    scan every player. Players can be found by their exact name (like nflgame.find), their normalized name or their last
+    name, and names with typos are matched by the three letter sequences they share with real names.
+    """
+
+    def __init__(self, players):
+        """
+        :param players: iterable of Player objects (e.g. nflgame.players.values())
+        """
+
+        self.players = {}
+        self._exact = {}
+        self._normalized = {}
+        self._last = {}
+        self._trigrams = {}
+        self._sizes = {}
+
+        for player in players:
+            self.players[player.player_id] = player
+            normalized = normalize_name(player.full_name)
+            self._exact.setdefault(player.full_name.lower(), []).append(player.player_id)
+            self._normalized.setdefault(normalized, []).append(player.player_id)
+            self._last.setdefault(normalize_name(player.last_name or ''), []).append(player.player_id)
+            self._sizes[player.player_id] = len(trigrams(normalized))
+            for trigram in trigrams(normalized):
+                self._trigrams.setdefault(trigram, []).append(player.player_id)
+
+    def find(self, name):
+        """
+        This method finds the players with a name matching (case insensitive) name, the same way nflgame.find does. If
+        there are no exact matches, names that only differ in punctuation and spacing are matched.
+
+        :param name: string, name of the player
+        :return: list of matching Player objects
+        """
+
+        player_ids = self._exact.get(name.lower()) or self._normalized.get(normalize_name(name), [])
+        return [self.players[player_id] for player_id in player_ids]
+
+    def suggest(self, name, limit=5):
+        """
+        This method finds the players whose names are closest to name, for when the name was misspelled. Players with
+        the same last name come first, then players ranked by the share of three letter sequences their names have in
+        common with name.
+
+        :param name: string, name of the player
+        :param limit: int, maximum number of suggestions
+        :return: list of Player objects, best match first
+        """
+
+        normalized = normalize_name(name)
+        query = trigrams(normalized)
+
+        # Count the trigrams each player shares with the name
+        shared = {}
+        for trigram in query:
+            for player_id in self._trigrams.get(trigram, []):
+                shared[player_id] = shared.get(player_id, 0) + 1
+
+        # Rank the players by the similarity (Jaccard index) of their trigrams to those of the name
+        scores = {}
+        for player_id, count in shared.items():
+            scores[player_id] = float(count) / (len(query) + self._sizes[player_id] - count)
+        for player_id in self._last.get(normalized.split(' ')[-1], []):
+            scores[player_id] = scores.get(player_id, 0.0) + 1.0
+
+        best = sorted(scores, key=lambda player_id: -scores[player_id])[:limit]
+        return [self.players[player_id] for player_id in best if scores[player_id] >= 0.3]
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+
+# Extension of player pools saved with save_player_pool
+POOL_EXTENSION = '.npy'
+
+
+def _to_text(value):
+    """
+    :param value: value of a text column (may be a byte string, unicode string or missing)
+    :return: unicode string
+    """
+    if pd.isnull(value):
+        return u''
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return u'%s' % value
+
+
+def _text_field(values):
+    """
+    :param values: column of strings
+    :return: numpy dtype of a fixed-width byte string long enough for every (UTF-8 encoded) value
+    """
+    longest = max([len(v.encode('utf-8')) for v in values] or [1])
+    return 'S'+str(max(1, longest))
+
+
+def save_player_pool(df, path):
+    """
+    This method writes a simulated player pool (the output of players_to_df) as a NumPy structured array, with one
+    typed column per field. Unlike a CSV, the file can be memory-mapped straight back into a DataFrame.
+
+    :param df: pandas dataframe with information on each player, indexed by player_id
+    :param path: string, file to write to (should end in POOL_EXTENSION)
+    """
+
+    text = {}
+    for column, values in [('player_id', df.index), ('full_name', df['full_name']), ('team', df['team']),
+                           ('position', df['position'])]:
+        text[column] = [_to_text(v) for v in values]
+
+    variance = df['variance'] if 'variance' in df.columns else np.full(len(df.index), np.nan)
+    dtype = [(column, _text_field(text[column])) for column in ['player_id', 'full_name', 'team', 'position']]
+    dtype += [('points', np.float32), ('variance', np.float32)]
+
+    records = np.empty(len(df.index), dtype=dtype)
+    for column in text:
+        records[column] = [v.encode('utf-8') for v in text[column]]
+    records['points'] = df['points'].values.astype(np.float32)
+    records['variance'] = np.asarray(variance, dtype=np.float32)
+    np.save(path, records)
+
+
+def load_player_pool(path):
+    """
+    This method memory-maps a player pool written by save_player_pool and wraps it in a DataFrame. The team and
+    position columns are categorical, and the points are float32.
+
+    :param path: string, file to read from
+    :return: pandas dataframe with information on each player, indexed by player_id
+    """
+
+    records = np.load(path, mmap_mode='r')
+    df = pd.DataFrame({'full_name': np.char.decode(records['full_name'], 'utf-8'),
+                       'team': pd.Categorical(np.char.decode(records['team'], 'utf-8')),
+                       'position': pd.Categorical(np.char.decode(records['position'], 'utf-8')),
+                       'points': records['points'],
+                       'variance': records['variance']},
+                      index=pd.Index(np.char.decode(records['player_id'], 'utf-8'), name='player_id'),
+                      columns=['full_name', 'team', 'position', 'points', 'variance'])
+    return df
+
+
+def load_players(path):
+    """
+    This method loads a simulated player pool from either the binary format (see save_player_pool) or a CSV export.
+
+    :param path: string, file to read from
+    :return: pandas dataframe with information on each player, indexed by player_id
+    """
+
+    if path.endswith(POOL_EXTENSION):
+        return load_player_pool(path)
+    return pd.read_csv(path).set_index('player_id')
@@ -0,0 +1,197 @@
+import cProfile
+import sys
+import time
+from tabulate import tabulate
+
+
+# Whether the counters and timers are recording (see enable). Recording is off by default so the hooks cost next to
+# nothing in normal runs.
+_enabled = False
+
+# Counts of events, and [calls, seconds] of timed stages, by name
+_counters = {}
+_timers = {}
+
+
+def enable(enabled=True):
+    """
+    This method turns the counters and timers on (or off).
+
+    :param enabled: boolean, whether to record
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    """
+    :return: boolean, whether the counters and timers are recording
+    """
+    return _enabled
+
+
+def reset():
+    """
+    This method clears every counter and timer.
+    """
+    _counters.clear()
+    _timers.clear()
+
+
+def count(name, n=1):
+    """
+    This method adds to a counter.
+
+    :param name: string, name of the counter
+    :param n: int, amount to add
+    """
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class timer(object):
+    """
+    This class is a context manager that adds the time spent in a block to a timed stage:
+
+        with profiling.timer('combine_game_stats'):
+            games = nflgame.combine_game_stats(games)
+    """
+
+    __slots__ = ['name', 'start']
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time() if _enabled else None
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.start is not None:
+            calls_seconds = _timers.setdefault(self.name, [0, 0.0])
+            calls_seconds[0] += 1
+            calls_seconds[1] += time.time() - self.start
+        return False
+
+
+def snapshot():
+    """
+    :return: dict with a copy of the counters and timers (e.g. to send from a worker process to merge)
+    """
+    return {'counters': dict(_counters), 'timers': dict((name, list(v)) for name, v in _timers.items())}
+
+
+def merge(other):
+    """
+    This method adds the counters and timers of a snapshot (e.g. from a worker process) to those of this process.
+
+    :param other: dict, the output of snapshot
+    """
+    for name, n in other['counters'].items():
+        _counters[name] = _counters.get(name, 0) + n
+    for name, (calls, seconds) in other['timers'].items():
+        calls_seconds = _timers.setdefault(name, [0, 0.0])
+        calls_seconds[0] += calls
+        calls_seconds[1] += seconds
+
+
+def summary():
+    """
+    This method formats the timed stages (slowest first) and the counters as a table.
+
+    :return: string, the table
+    """
+
+    rows = [[name, calls, '%.3f' % seconds, '%.3f' % (1000.0 * seconds / calls) if calls else '']
+            for name, (calls, seconds) in sorted(_timers.items(), key=lambda item: -item[1][1])]
+    rows += [[name, n, '', ''] for name, n in sorted(_counters.items())]
+    return tabulate(rows, headers=['stage / counter', 'count', 'seconds', 'ms per call'], tablefmt='psql')
+
+
+class Trace(object):
+    """
+    This class records a cProfile trace of a block and writes it to a .prof file, which can be read with pstats or
+    turned into a flame graph (e.g. with snakeviz or flameprof).
+    """
+
+    def __init__(self, path):
+        """
+        :param path: string, file to write the trace to (nothing is recorded if None)
+        """
+        self.path = path
+        self.profile = cProfile.Profile() if path else None
+
+    def start(self):
+        """
+        This method starts recording.
+        """
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        """
+        This method stops recording and writes the trace.
+        """
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.path)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+class Progress(object):
+    """
+    This class keeps a single progress line up to date, with the throughput and the estimated time left.
+    """
+
+    def __init__(self, total, label, unit='players', stream=None, interval=0.5):
+        """
+        :param total: int, number of items to process
+        :param label: string, shown at the start of the line
+        :param unit: string, name of the items (used for the throughput)
+        :param stream: file to write the line to (defaults to sys.stdout)
+        :param interval: float, minimum number of seconds between redraws
+        """
+
+        self.total = total
+        self.label = label
+        self.unit = unit
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.done = 0
+        self.start = time.time()
+        self._drawn = 0.0
+
+    def update(self, n=1):
+        """
+        This method marks more items as done, and redraws the line if it hasn't been redrawn for a while.
+
+        :param n: int, number of items that were just processed
+        """
+        self.done += n
+        now = time.time()
+        if now - self._drawn >= self.interval or self.done >= self.total:
+            self._drawn = now
+            self._draw(now - self.start)
+
+    def _draw(self, elapsed):
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else float('nan')
+        eta = '%d:%02d' % divmod(int(eta), 60) if eta == eta else '?'
+        self.stream.write('\r%s %d of %d (%.1f %s/s, ETA %s)  '
+                          % (self.label, self.done, self.total, rate, self.unit, eta))
+        self.stream.flush()
+
+    def finish(self):
+        """
+        This method draws the line one last time and moves on to a new line.
+        """
+        self._draw(time.time() - self.start)
+        self.stream.write('\n')
+        self.stream.flush()
@@ -0,0 +1,138 @@
+import numpy as np
+
+
+class SeasonWeights(object):
+    """
+    This weighting model gives every week of a season the same weight, with a separate weight for each season. Seasons
+    that are not listed are never sampled.
+    """
+
+    def __init__(self, weights):
+        """
+        :param weights: dict mapping each season to its weight
+        """
+        self.weights = dict((int(year), float(weight)) for year, weight in weights.items())
+
+    def key(self):
+        """
+        :return: string identifying the model and its parameters
+        """
+        return 'seasons:'+','.join('%d=%r' % (year, self.weights[year]) for year in sorted(self.weights))
+
+    def column_weights(self, columns):
+        """
+        :param columns: list of (year, week) tuples
+        :return: numpy array with the weight of each (year, week)
+        """
+        return np.array([self.weights.get(year, 0.0) for year, week in columns])
+
+
+class ExponentialDecay(object):
+    """
+    This weighting model halves the weight of a week every half_life seasons, counting back from the most recent week
+    that can be sampled. Older weeks are given less weight since recent weeks are a better reflection of player ability.
+    """
+
+    def __init__(self, half_life, weeks_per_season=17):
+        """
+        :param half_life: float, number of seasons after which a week has half the weight
+        :param weeks_per_season: int, number of weeks in a season (used to age weeks within a season)
+        """
+        self.half_life = float(half_life)
+        self.weeks_per_season = weeks_per_season
+
+    def key(self):
+        """
+        :return: string identifying the model and its parameters
+        """
+        return 'decay:%r,%d' % (self.half_life, self.weeks_per_season)
+
+    def column_weights(self, columns):
+        """
+        :param columns: list of (year, week) tuples
+        :return: numpy array with the weight of each (year, week)
+        """
+        age = np.array([year + (week - 1.0) / self.weeks_per_season for year, week in columns])
+        return 0.5 ** ((age.max() - age) / self.half_life) if len(columns) else age
+
+
+def alias_table(weights):
+    """
+    This method builds a Walker/Vose alias table for drawing from a discrete distribution in constant time: draw a
+    column uniformly, then keep it with probability prob[column] or take alias[column] instead. Columns with zero weight
+    are never drawn.
+
+    :param weights: numpy array of non-negative weights (at least one positive)
+    :return: numpy arrays prob and alias
+
+    >>> prob, alias = alias_table(np.array([1.0, 0.0, 3.0]))
+    >>> [float(round(p, 2)) for p in prob], [int(a) for a in alias]
+    ([0.75, 0.0, 1.0], [2, 2, 2])
+    """
+
+    n = len(weights)
+    scaled = weights * n / weights.sum()
+    prob = np.zeros(n)
+    alias = np.arange(n)
+
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+
+    # Whatever is left is (up to rounding) exactly full, unless it never should be drawn
+    heaviest = int(np.argmax(weights))
+    for i in large + small:
+        if weights[i] > 0:
+            prob[i] = 1.0
+        else:
+            alias[i] = heaviest
+    return prob, alias
+
+
+def build_sampling_tables(points, columns, model):
+    """
+    This method compiles the weighting model into an alias table for every player, over only the weeks that player
+    actually played in. Drawing a week for a player then takes constant time and never lands on a week they missed.
+
+    :param points: 2d array of fantasy points (players x weeks), NaN where the player did not play
+    :param columns: list of (year, week) tuples (one per column of points)
+    :param model: weighting model (e.g. SeasonWeights or ExponentialDecay)
+    :return: numpy arrays prob and alias (players x weeks), and a boolean array of the players that can be sampled
+    """
+
+    weights = model.column_weights(columns)
+    prob = np.zeros(points.shape)
+    alias = np.tile(np.arange(points.shape[1]), (points.shape[0], 1))
+    playable = np.zeros(points.shape[0], dtype=bool)
+
+    for row in range(points.shape[0]):
+        player_weights = np.where(np.isnan(points[row]), 0.0, weights)
+        if player_weights.sum() > 0:
+            prob[row], alias[row] = alias_table(player_weights)
+            playable[row] = True
+    return prob, alias, playable
+
+
+def draw_columns(prob, alias, row, size, rng):
+    """
+    This method draws weeks for one player from their alias table.
+
+    :param prob: numpy array of keep probabilities (players x weeks)
+    :param alias: numpy array of alias columns (players x weeks)
+    :param row: int, row of the player
+    :param size: int, number of weeks to draw
+    :param rng: numpy RandomState
+    :return: numpy array of drawn columns
+    """
+    columns = rng.randint(0, prob.shape[1], size=size)
+    keep = rng.random_sample(size) < prob[row, columns]
+    return np.where(keep, columns, alias[row, columns])
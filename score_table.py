@@ -0,0 +1,151 @@
+import hashlib
+import os.path
+import numpy as np
+from ingest import ScoreStore
+from sampling import build_sampling_tables
+from scoring import STAT_COLUMNS
+
+
+class ScoreTable(object):
+    """
+    This class holds the stats of every player in every (year, week) that is sampled by the MC simulation, along with
+    the fantasy points they earned. The stats are kept in a players x weeks x stats array, with NaN marking the weeks a
+    player did not play, so that looking up a sample is a single array access instead of a full parse of the week, and
+    switching to another scoring profile only takes one matrix product.
+    """
+
+    def __init__(self, player_ids, weeks, stats, weights):
+        """
+        :param player_ids: list of player_id strings (one per row of stats)
+        :param weeks: list of (year, week) tuples (one per column of stats)
+        :param stats: 3d array of stats aligned with STAT_COLUMNS, NaN where the player did not play
+        :param weights: numpy array of points per unit of each stat (see scoring.compile_profile)
+        """
+
+        self.player_ids = np.asarray(player_ids)
+        self.weeks = [(int(year), int(week)) for year, week in weeks]
+        self.stats = np.asarray(stats, dtype=np.float32)
+        self.rescore(weights)
+
+        # Fingerprint of the data, so that results simulated from it can be told apart from those of other data
+        fingerprint = hashlib.sha1(np.ascontiguousarray(self.stats).tobytes())
+        fingerprint.update(repr(self.weeks).encode('utf-8'))
+        fingerprint.update(','.join(self.player_ids).encode('utf-8'))
+        self.version = fingerprint.hexdigest()
+
+        # Lookup tables from player_id to row and from (year, week) to column
+        self._rows = dict((pid, i) for i, pid in enumerate(self.player_ids))
+        self._columns = dict((w, i) for i, w in enumerate(self.weeks))
+
+        # Alias tables compiled for each weighting model (see sampling_tables)
+        self._sampling_tables = {}
+
+    def sampling_tables(self, model):
+        """
+        This method returns the alias tables of every player for a weighting model, compiling them the first time
+        the model is used. They only depend on which weeks each player played, so rescoring does not change them.
+
+        :param model: weighting model (e.g. sampling.SeasonWeights or sampling.ExponentialDecay)
+        :return: numpy arrays prob and alias (players x weeks), and a boolean array of the players that can be sampled
+        """
+        if model.key() not in self._sampling_tables:
+            self._sampling_tables[model.key()] = build_sampling_tables(self.stats[:, :, 0], self.weeks, model)
+        return self._sampling_tables[model.key()]
+
+    def rescore(self, weights):
+        """
+        This method recomputes the fantasy points of every player in every week with another set of scoring weights.
+
+        :param weights: numpy array of points per unit of each stat (see scoring.compile_profile)
+        """
+        self.points = np.dot(self.stats, np.asarray(weights, dtype=np.float32))
+
+    def row(self, player_id):
+        """
+        :param player_id: string, id of the player
+        :return: int, row of the player in the points matrix (None if the player never played)
+        """
+        return self._rows.get(player_id)
+
+    def column(self, year, week):
+        """
+        :param year: int, season
+        :param week: int, week of the season
+        :return: int, column of the (year, week) in the points matrix (None if the week was not loaded)
+        """
+        return self._columns.get((year, week))
+
+    def save(self, path):
+        """
+        Writes the table to disk as a compressed NumPy archive.
+
+        :param path: string, file to write to
+        """
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, player_ids=self.player_ids, weeks=np.array(self.weeks, dtype=np.int32),
+                                stats=self.stats, stat_columns=np.array(STAT_COLUMNS))
+
+    @classmethod
+    def load(cls, path, weights):
+        """
+        Reads a table that was written by save().
+
+        :param path: string, file to read from
+        :param weights: numpy array of points per unit of each stat (see scoring.compile_profile)
+        :return: ScoreTable
+        """
+        with np.load(path) as data:
+            if 'stats' not in data.files or data['stat_columns'].astype(str).tolist() != STAT_COLUMNS:
+                raise ValueError(path+' was written by an older version and has to be rebuilt')
+            return cls(data['player_ids'].astype(str), data['weeks'].tolist(), data['stats'], weights)
+
+
+def build_score_table(years, weeks, weights, store_directory):
+    """
+    This method streams every (year, week) that has not been parsed yet into the weekly stats store, then lays the
+    stored stats out as a ScoreTable. This is the build step that the MC simulation samples from.
+
+    :param years: list of ints, seasons to load
+    :param weeks: list of ints, weeks of each season to load
+    :param weights: numpy array of points per unit of each stat (see scoring.compile_profile)
+    :param store_directory: string, folder of the weekly stats store (see ingest.ScoreStore)
+    :return: ScoreTable
+    """
+
+    store = ScoreStore(store_directory)
+    store.ingest(years, weeks)
+    player_ids, columns, stats = store.load(years, weeks)
+    return ScoreTable(player_ids, columns, stats, weights)
+
+
+def get_score_table(path, years, weeks, weights, store_directory):
+    """
+    This method loads the score table from disk, building and saving it first if it does not exist yet (or does not
+    cover all of the requested weeks, in which case only the missing weeks are parsed). The games of partial weeks that
+    finished since are parsed, and the table is rebuilt if the store has changed since it was saved.
+
+    :param path: string, file the table is stored in
+    :param years: list of ints, seasons to load if the table has to be built
+    :param weeks: list of ints, weeks to load if the table has to be built
+    :param weights: numpy array of points per unit of each stat (see scoring.compile_profile)
+    :param store_directory: string, folder of the weekly stats store (see ingest.ScoreStore)
+    :return: ScoreTable
+    """
+
+    if os.path.isfile(path):
+        try:
+            table = ScoreTable.load(path, weights)
+            store = ScoreStore(store_directory)
+            for year, week in table.weeks:
+                if store.is_partial(year, week):
+                    store.ingest([year], [week])
+            if table.weeks == [(year, week) for year in years for week in weeks] and \
+                    store.modified() <= os.path.getmtime(path):
+                return table
+        except ValueError as e:
+            print(str(e))
+
+    print('Building weekly score table...')
+    table = build_score_table(years, weeks, weights, store_directory)
+    table.save(path)
+    return table
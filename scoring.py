@@ -0,0 +1,106 @@
+import json
+import os.path
+import numpy as np
+
+
+# Stats that can be mapped to fantasy football points, in the order they are stored in stat vectors and matrices
+STAT_COLUMNS = ['passing_twoptm', 'passing_yds', 'passing_tds', 'passing_ints', 'rushing_yds', 'rushing_tds',
+                'rushing_twoptm', 'receiving_yds', 'receiving_rec', 'receiving_tds', 'receiving_twoptm', 'kickret_tds',
+                'puntret_tds', 'fumbles_lost', 'kicking_fgb', 'fumbles_rec_tds', 'defense_int_tds', 'fumble_rec_tds',
+                'defense_safe', 'defense_fgblk', 'defense_puntblk', 'defense_int', 'fumbles_rec', 'kicking_fgmissed',
+                'defense_sk']
+
+# Points earned for each stat in a standard (no points per reception) league
+STANDARD = {'passing_twoptm': 2.0,
+            'passing_yds': 0.2 / 5.0,
+            'passing_tds': 4.0,
+            'passing_ints': -2.0,
+            'rushing_yds': 0.1,
+            'rushing_tds': 6.0,
+            'rushing_twoptm': 2.0,
+            'receiving_yds': 0.1,
+            'receiving_rec': 0.0,
+            'receiving_tds': 6.0,
+            'receiving_twoptm': 2.0,
+            'kickret_tds': 6.0,
+            'puntret_tds': 6.0,
+            'fumbles_lost': -2.0,
+            'kicking_fgb': -1.0,
+            'fumbles_rec_tds': 6.0,
+            'defense_int_tds': 6.0,
+            'fumble_rec_tds': 6.0,
+            'defense_safe': 2.0,
+            'defense_fgblk': 2.0,
+            'defense_puntblk': 2.0,
+            'defense_int': 2.0,
+            'fumbles_rec': 2.0,
+            'kicking_fgmissed': -1.0,
+            'defense_sk': 1.0}
+
+# Built in scoring profiles, by name
+PROFILES = {'standard': STANDARD,
+            'half_ppr': dict(STANDARD, receiving_rec=0.5),
+            'ppr': dict(STANDARD, receiving_rec=1.0)}
+
+# Profile used unless another one is chosen (the rules this program has always scored with)
+DEFAULT_PROFILE = 'half_ppr'
+
+
+def load_profile(profile):
+    """
+    This method looks up a scoring profile. A profile can be the name of one of the built in PROFILES, the path to a JSON
+    file, or a dict. A custom profile maps stats to the points earned for each one, and may name a built in profile under
+    'base' to start from (stats that aren't listed otherwise earn no points).
+
+    :param profile: string or dict, the scoring profile
+    :return: dict mapping each stat in STAT_COLUMNS to the points it earns
+
+    >>> load_profile('ppr')['receiving_rec']
+    1.0
+
+    >>> load_profile({'base': 'standard', 'passing_tds': 6})['passing_tds']
+    6.0
+    """
+
+    if not isinstance(profile, dict):
+        if profile in PROFILES:
+            return dict(PROFILES[profile])
+        if not os.path.isfile(profile):
+            raise ValueError('Unknown scoring profile: '+str(profile))
+        with open(profile) as f:
+            profile = json.load(f)
+
+    profile = dict(profile)
+    if 'base' in profile and profile['base'] not in PROFILES:
+        raise ValueError('Unknown base scoring profile: '+str(profile['base']))
+    rules = dict(PROFILES[profile.pop('base')]) if 'base' in profile else dict((stat, 0.0) for stat in STAT_COLUMNS)
+    for stat, points in profile.items():
+        if stat not in rules:
+            raise ValueError('Unknown stat in scoring profile: '+str(stat))
+        rules[stat] = float(points)
+    return rules
+
+
+def compile_profile(profile):
+    """
+    This method compiles a scoring profile into a weight vector aligned with STAT_COLUMNS, so that the points of a
+    player (or of a whole matrix of players) are a single dot product with their stats.
+
+    :param profile: string or dict, the scoring profile (see load_profile)
+    :return: numpy array of points per unit of each stat
+    """
+
+    rules = load_profile(profile)
+    return np.array([rules[stat] for stat in STAT_COLUMNS])
+
+
+def stat_vector(player):
+    """
+    This method pulls the stats of a player that can earn fantasy points into a vector aligned with STAT_COLUMNS.
+
+    :param player: PlayerStats object (with combined plays)
+    :return: numpy array of the players stats
+    """
+
+    stats = player._stats
+    return np.array([stats.get(stat, 0) for stat in STAT_COLUMNS], dtype=np.float64)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+
+def merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    This method combines the running statistics of two sets of simulations of the same players (Chan et al.), so that
+    new simulations can be added to earlier ones without keeping the individual scores around.
+
+    :param count_a: int or array, number of simulations in the first set
+    :param mean_a: float or array, mean score of the first set
+    :param m2_a: float or array, sum of squared differences from the mean of the first set
+    :param count_b: int or array, number of simulations in the second set
+    :param mean_b: float or array, mean score of the second set
+    :param m2_b: float or array, sum of squared differences from the mean of the second set
+    :return: count, mean and sum of squared differences of both sets together
+
+    >>> [float(x) for x in merge_moments(2, 1.0, 2.0, 2, 3.0, 2.0)]
+    [4.0, 2.0, 8.0]
+    """
+
+    count = count_a + count_b
+    total = np.asarray(count, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        delta = np.subtract(mean_b, mean_a)
+
+        # Players that missed a simulation (-inf) stay at -inf
+        mean = np.where(np.isfinite(delta), np.add(mean_a, delta * count_b / total), np.minimum(mean_a, mean_b))
+        m2 = np.add(m2_a, m2_b) + delta ** 2 * count_a * count_b / total
+    return count, mean[()], m2[()]
+
+
+class SimulationCache(object):
+    """
+    This class stores the results of simulating each player on disk, so that later runs can reuse them. Every entry is
+    addressed by a hash of everything the result depends on (player, seed, scoring weights and score table data), and
+    holds the number of simulations run so far along with their mean and sum of squared differences. When the cache
+    grows past max_bytes, the least recently used entries are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024):
+        """
+        :param directory: string, folder the entries are stored in (created if it does not exist)
+        :param max_bytes: int, size the cache is trimmed back to after new entries are written
+        """
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def key(player_id, seed, weights, data_version):
+        """
+        :param player_id: string, id of the player
+        :param seed: int, seed of the simulation
+        :param weights: numpy array of points per unit of each stat
+        :param data_version: string, version of the score table the player is sampled from
+        :return: string, address of the players entry
+        """
+        parts = [str(player_id), str(seed), ','.join(repr(float(w)) for w in weights), str(data_version)]
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key+'.json')
+
+    def get(self, key):
+        """
+        :param key: string, address of the entry
+        :return: tuple of count, mean and sum of squared differences (None if there is no entry)
+        """
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Mark the entry as recently used
+        os.utime(path, None)
+        self.hits += 1
+        return entry['count'], entry['mean'], entry['m2']
+
+    def put(self, key, count, mean, m2):
+        """
+        :param key: string, address of the entry
+        :param count: int, number of simulations
+        :param mean: float, mean simulated score
+        :param m2: float, sum of squared differences from the mean
+        """
+        with open(self._path(key), 'w') as f:
+            json.dump({'count': int(count), 'mean': float(mean), 'm2': float(m2)}, f)
+
+    def evict(self):
+        """
+        This method deletes the least recently used entries until the cache is no bigger than max_bytes.
+        """
+
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            info = os.stat(path)
+            entries.append((info.st_mtime, info.st_size, path))
+
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            os.remove(path)
+            size -= entry_size
+            self.evictions += 1
+
+    def stats(self):
+        """
+        :return: dict with the number of hits, misses and evictions since the cache was opened
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
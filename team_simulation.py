@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from sampling import alias_table
+
+
+# Quantiles of the weekly team score reported for each roster, and the share of worst weeks averaged for the
+# downside risk (conditional value at risk)
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+CVAR_ALPHA = 0.1
+
+
+def draw_weeks(columns, model, N, rng):
+    """
+    This method draws the (year, week)s a whole roster is simulated in. Every player on a roster plays the same week
+    in a draw, so players that score together (e.g. a QB and his WR) are simulated together.
+
+    :param columns: list of (year, week) tuples that can be drawn
+    :param model: weighting model (e.g. sampling.SeasonWeights or sampling.ExponentialDecay)
+    :param N: int, number of weeks to draw
+    :param rng: numpy RandomState
+    :return: numpy array of drawn columns
+    """
+
+    prob, alias = alias_table(model.column_weights(columns))
+    drawn = rng.randint(0, len(columns), size=N)
+    keep = rng.random_sample(N) < prob[drawn]
+    return np.where(keep, drawn, alias[drawn])
+
+
+def summarize(scores, quantiles=QUANTILES, alpha=CVAR_ALPHA):
+    """
+    :param scores: 2d array of team scores (rosters x draws)
+    :param quantiles: list of quantiles to report
+    :param alpha: float, share of worst draws averaged for the cvar
+    :return: dict of arrays (one value per roster): mean, std, a 'q<percent>' entry per quantile and cvar
+    """
+
+    summary = {'mean': scores.mean(axis=1), 'std': scores.std(axis=1)}
+    for q, values in zip(quantiles, np.percentile(scores, [100.0 * q for q in quantiles], axis=1)):
+        summary['q%02d' % int(round(100 * q))] = values
+    worst = max(1, int(alpha * scores.shape[1]))
+    summary['cvar'] = np.partition(scores, worst - 1, axis=1)[:, :worst].mean(axis=1)
+    return summary
+
+
+def roster_distributions(points, rosters, weeks, quantiles=QUANTILES, alpha=CVAR_ALPHA, chunk_size=1024):
+    """
+    This method computes the distribution of the weekly score of many rosters at once. The points of every player that
+    appears on any roster are gathered for the drawn weeks (0 for weeks they did not play), and each roster's scores
+    are a row of the product of a roster x player incidence matrix with that players x draws matrix. Rosters are
+    processed chunk_size at a time, so memory does not grow with the number of rosters.
+
+    :param points: 2d array of fantasy points (players x weeks), NaN where the player did not play
+    :param rosters: list of rosters, each a list of rows of points (None for players that never played)
+    :param weeks: numpy array of drawn columns of points (see draw_weeks)
+    :param quantiles: list of quantiles to report
+    :param alpha: float, share of worst draws averaged for the cvar
+    :param chunk_size: int, number of rosters scored at a time
+    :return: pandas dataframe with one row per roster (see summarize for the columns)
+    """
+
+    rows = sorted(set(row for roster in rosters for row in roster if row is not None))
+    local = dict((row, i) for i, row in enumerate(rows))
+    weekly = np.nan_to_num(points[np.array(rows, dtype=np.int64)][:, weeks]) if rows \
+        else np.zeros((0, len(weeks)), dtype=np.float32)
+
+    summaries = []
+    for start in range(0, len(rosters), chunk_size):
+        chunk = rosters[start:start + chunk_size]
+        incidence = np.zeros((len(chunk), len(rows)), dtype=weekly.dtype)
+        for i, roster in enumerate(chunk):
+            for row in roster:
+                if row is not None:
+                    incidence[i, local[row]] += 1
+        summaries.append(pd.DataFrame(summarize(incidence.dot(weekly).astype(np.float64), quantiles, alpha)))
+
+    columns = ['mean', 'std'] + ['q%02d' % int(round(100 * q)) for q in quantiles] + ['cvar']
+    if not summaries:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(summaries, ignore_index=True)[columns]
+
+
+def risk_adjusted(distributions, risk_aversion):
+    """
+    :param distributions: pandas dataframe of roster score distributions (see roster_distributions)
+    :param risk_aversion: float between 0 (only the mean counts) and 1 (only the cvar counts)
+    :return: pandas series with the score to maximize for each roster
+    """
+    return (1.0 - risk_aversion) * distributions['mean'] + risk_aversion * distributions['cvar']